@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException
+
+# bcrypt libera el GIL, así que un pool de hilos dedicado basta; "process"
+# aísla por completo el costo de CPU del proceso que atiende peticiones
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread").lower()
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Máximo de operaciones en cola + en ejecución antes de rechazar con 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+
+def _timed(fn, args, submitted_at):
+    started_at = time.monotonic()
+    return fn(*args), started_at - submitted_at, time.monotonic() - started_at
+
+
+class HashingPool:
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        # El executor se crea en el lifespan (start) y se cierra al apagar:
+        # así un segundo arranque en el mismo proceso tiene uno nuevo
+        self._executor = None
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+        if self._executor is None:
+            # Fuera del lifespan (scripts); run_in_executor(None) usaría el pool por defecto
+            self.start()
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            result, waited, elapsed = await loop.run_in_executor(
+                self._executor, _timed, fn, args, time.monotonic()
+            )
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+        self.run_time_total += elapsed
+        return result
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / self.completed if self.completed else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+            "run_time_avg": self.run_time_total / self.completed if self.completed else 0.0,
+        }
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_MAX_PENDING, HASH_EXECUTOR)
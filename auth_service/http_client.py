@@ -0,0 +1,58 @@
+import os
+import httpx
+from fastapi import Request
+from discovery import DiscoveryTransport
+from metrics import InstrumentedTransport
+from resilience import ResilienceTransport
+from tracing import TRACING_ENABLED, TracingTransport
+
+# Pool de conexiones compartido por todas las llamadas salientes del proceso
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 requiere el paquete "h2" (pip install httpx[http2])
+HTTP2 = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Timeout (segundos) por servicio destino
+TIMEOUTS = {
+    "users": float(os.getenv("USERS_TIMEOUT", "5")),
+}
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+
+
+def create_http_client():
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2,
+    )
+    transport = InstrumentedTransport(ResilienceTransport(DiscoveryTransport(transport)))
+    if TRACING_ENABLED:
+        transport = TracingTransport(transport)
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(5.0, connect=CONNECT_TIMEOUT),
+    )
+
+
+def timeout_for(target: str):
+    return httpx.Timeout(TIMEOUTS[target], connect=min(CONNECT_TIMEOUT, TIMEOUTS[target]))
+
+
+def request_options(target: str, idempotent: bool = False):
+    # kwargs para client.get/post: timeout del destino y su nombre para métricas.
+    # La extensión no puede llamarse "target": httpcore la usa como ruta de la petición.
+    # idempotent=True permite reintentar un POST que no modifica nada
+    return {"timeout": timeout_for(target), "extensions": {"service": target, "idempotent": idempotent}}
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    # El cliente se crea en el lifespan de la app; si no existe (p. ej. en
+    # scripts sin lifespan) se crea uno la primera vez
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
+        client = request.app.state.http_client = create_http_client()
+    return client
@@ -1,15 +1,66 @@
+# Se mide desde la primera línea: el tiempo de import es la mayor parte
+# del arranque en frío
+import time
+IMPORT_STARTED = time.perf_counter()
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from logging_config import setup_logging, shutdown_logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette import status
-from database import Base, engine
+from database import async_engine
+from migrations import RUN_MIGRATIONS_ON_STARTUP, run_migrations
 from routes import router
+from http_client import create_http_client
+from discovery import registry
+from resilience import circuit_stats
+from metrics import MetricsMiddleware, metrics_response, register_stats
+from tracing import TRACING_ENABLED, TracingMiddleware
+from hashing import hashing_pool
+from outbox import outbox_dispatcher
 from fastapi.openapi.utils import get_openapi
 
-app = FastAPI(title="Auth Microservice")
+# Esquema OpenAPI generado con export_openapi.py; si existe se sirve tal cual
+# en lugar de construirlo en la primera visita a /docs
+OPENAPI_SCHEMA_PATH = os.getenv("OPENAPI_SCHEMA_PATH")
+
+logger = logging.getLogger("startup")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # El esquema y la primera conexión se preparan aquí y no al importar;
+    # las migraciones corren en un hilo para no bloquear el event loop
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await asyncio.to_thread(run_migrations)
+    async with async_engine.connect():
+        pass
+    hashing_pool.start()
+    app.state.http_client = create_http_client()
+    outbox_dispatcher.start(app.state.http_client)
+    startup_timings["lifespan_seconds"] = round(time.perf_counter() - started, 4)
+    logger.info("Servicio listo", extra=startup_timings)
+    yield
+    await outbox_dispatcher.stop()
+    await app.state.http_client.aclose()
+    await async_engine.dispose()
+    hashing_pool.shutdown()
+    shutdown_logging()
+
+setup_logging()
+app = FastAPI(title="Auth Microservice", lifespan=lifespan)
 
-Base.metadata.create_all(bind=engine)
 app.include_router(router)
+app.add_middleware(MetricsMiddleware)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+register_stats("password_hashing", hashing_pool.stats)
+register_stats("discovery", registry.stats)
+register_stats("http_client", circuit_stats)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -24,9 +75,11 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 def root():
     return {"Message": "This is the DiDi API"}
 
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+def build_openapi():
     openapi_schema = get_openapi(
         title="Auth Microservice",
         version="0.1.0",
@@ -41,8 +94,20 @@ def custom_openapi():
         }
     }
     openapi_schema["security"] = [{"BearerAuth": []}]
-    app.openapi_schema = openapi_schema
+    return openapi_schema
+
+def custom_openapi():
+    if app.openapi_schema:
+        return app.openapi_schema
+    if OPENAPI_SCHEMA_PATH and os.path.exists(OPENAPI_SCHEMA_PATH):
+        with open(OPENAPI_SCHEMA_PATH, encoding="utf-8") as fh:
+            app.openapi_schema = json.load(fh)
+    else:
+        app.openapi_schema = build_openapi()
     return app.openapi_schema
 
 app.openapi = custom_openapi
 
+startup_timings = {"import_seconds": round(time.perf_counter() - IMPORT_STARTED, 4)}
+register_stats("startup", lambda: startup_timings)
+
@@ -0,0 +1,98 @@
+import os
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, inspect, text
+from sqlalchemy.schema import CreateColumn
+from database import engine
+
+# Migraciones versionadas del esquema. Por defecto se aplican al arrancar la
+# app: el despliegue en Render es de un solo worker y no tiene paso previo.
+# Con varios workers, poner RUN_MIGRATIONS_ON_STARTUP=false y ejecutar
+# "python migrate.py" antes de arrancarlos
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# Cada migración describe las tablas tal como quedaron en su versión y no
+# lee los modelos: si lo hiciera, cambiaría con cada edición posterior.
+# Las operaciones son idempotentes porque las bases existentes (creadas con
+# create_all antes de versionar el esquema) pueden tener ya parte del cambio
+def add_column(conn, table_name: str, column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name not in existing:
+        ddl = CreateColumn(column).compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+
+
+def create_index(conn, name: str, table_name: str, *column_names):
+    table = Table(table_name, MetaData(), *(Column(column_name) for column_name in column_names))
+    Index(name, *table.columns).create(bind=conn, checkfirst=True)
+
+
+def initial_schema(conn):
+    # Esquema de la primera versión desplegada
+    users = Table(
+        "users",
+        MetaData(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("email", String, unique=True, nullable=False),
+        Column("password", String, nullable=False),
+        Column("role", String),
+    )
+    users.create(bind=conn, checkfirst=True)
+
+
+def outbox_events(conn):
+    outbox = Table(
+        "outbox_events",
+        MetaData(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("event_type", String, nullable=False),
+        Column("payload", Text, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("attempts", Integer, nullable=False),
+        Column("next_attempt_at", DateTime, nullable=False, index=True),
+        Column("delivered_at", DateTime, nullable=True, index=True),
+        Column("last_error", String(255), nullable=True),
+    )
+    outbox.create(bind=conn, checkfirst=True)
+
+
+def outbox_dead_letter(conn):
+    add_column(conn, "outbox_events", Column("failed_at", DateTime, nullable=True))
+
+
+MIGRATIONS = [
+    (1, "Esquema inicial", initial_schema),
+    (2, "Tabla outbox_events", outbox_events),
+    (3, "outbox_events.failed_at (cola de muertos)", outbox_dead_letter),
+]
+
+def applied_versions(bind=engine):
+    schema_version.create(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        return {row.version: row for row in conn.execute(schema_version.select())}
+
+
+def run_migrations(bind=engine):
+    # Cada migración va en su propia transacción junto con su registro en
+    # schema_version; si dos procesos coinciden, la clave primaria hace
+    # fallar al segundo en lugar de aplicarla dos veces
+    done = applied_versions(bind)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        applied.append((version, description))
+    return applied
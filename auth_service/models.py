@@ -1,6 +1,7 @@
 # models.py
-from sqlalchemy import Column, Integer, String
-from pydantic import BaseModel
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from pydantic import BaseModel, Field
 from database import Base
 
 class User(Base):
@@ -11,8 +12,25 @@ class User(Base):
     role = Column(String, default="cliente")
 
 
+class OutboxEvent(Base):
+    # Eventos pendientes de entregar a otros servicios (patrón outbox)
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    delivered_at = Column(DateTime, nullable=True, index=True)
+    # Rechazado por el destino o sin más reintentos (cola de muertos)
+    failed_at = Column(DateTime, nullable=True)
+    last_error = Column(String(255), nullable=True)
+
+
 class UserCreate(BaseModel):
-    email: str
+    # Mismas reglas que UserSync en users_service: si no, el registro se
+    # acepta aquí y el outbox nunca lo puede sincronizar
+    email: str = Field(..., min_length=3, max_length=255)
     password: str
     role: str = "cliente"
 
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+import httpx
+from sqlalchemy import select
+from database import Session
+from discovery import service_url
+from http_client import request_options
+from metrics import Counter
+from models import OutboxEvent
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_BASE_BACKOFF = float(os.getenv("OUTBOX_BASE_BACKOFF", "1"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "300"))
+# Tras este número de intentos fallidos el evento pasa a la cola de muertos
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+# Respuestas de /sync_users que rechazan el contenido: reintentar no sirve
+REJECTED_STATUSES = (400, 409, 422)
+# Token ausente o distinto, o users_service sin configurar o caído: el
+# problema no es del evento y reintentarlo no gasta intentos
+BLOCKED_STATUSES = (401, 403, 503)
+OUTBOX_BLOCKED_RETRY = float(os.getenv("OUTBOX_BLOCKED_RETRY", "30"))
+# Debe coincidir con el de users_service, que lo exige en /sync_users
+INTERNAL_SYNC_TOKEN = os.getenv("INTERNAL_SYNC_TOKEN")
+
+logger = logging.getLogger("outbox")
+
+OUTBOX_DELIVERED = Counter("outbox_events_delivered_total", "Eventos del outbox entregados")
+OUTBOX_FAILED = Counter("outbox_delivery_failures_total", "Intentos fallidos de entrega del outbox")
+OUTBOX_DEAD = Counter("outbox_events_dead_total", "Eventos del outbox rechazados o sin más reintentos")
+OUTBOX_BLOCKED = Counter("outbox_delivery_blocked_total", "Entregas del outbox bloqueadas por configuración o caída de users_service")
+
+
+def add_event(db, event_type: str, payload: dict):
+    # Se agrega a la misma sesión: el evento se guarda en la misma
+    # transacción que el cambio que lo origina
+    db.add(OutboxEvent(event_type=event_type, payload=json.dumps(payload)))
+
+
+def backoff(attempts: int):
+    # Exponencial con jitter completo
+    return random.uniform(0, min(OUTBOX_MAX_BACKOFF, OUTBOX_BASE_BACKOFF * 2 ** attempts))
+
+
+class OutboxDispatcher:
+    # Entrega los eventos pendientes a users_service en segundo plano.
+    # La entrega es "al menos una vez": /sync_users es idempotente
+    def __init__(self):
+        self.client = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+    def start(self, client: httpx.AsyncClient):
+        self.client = client
+        # El Event queda ligado al loop que lo usa: uno nuevo por arranque
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                # Un error de base de datos no debe matar el despachador
+                logger.exception("Error procesando el outbox")
+                processed = 0
+            if processed >= OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _deliver(self, events: list[OutboxEvent]):
+        # Todo el lote va en una sola llamada al endpoint masivo de users_service.
+        # Devuelve (error, tipo): tipo es "rejected", "blocked" o "retry", y
+        # error es None si se entregó
+        try:
+            response = await self.client.post(
+                service_url("users", "/sync_users"),
+                json={"users": [json.loads(event.payload) for event in events]},
+                headers={"X-Internal-Token": INTERNAL_SYNC_TOKEN} if INTERNAL_SYNC_TOKEN else {},
+                **request_options("users")
+            )
+        except httpx.RequestError as exc:
+            return f"{type(exc).__name__}: {exc}", "retry"
+        if response.status_code >= 300:
+            # Solo 400/409/422 rechazan el contenido del evento; cualquier otro
+            # código (p. ej. un 404 mientras se despliega users_service) se reintenta
+            if response.status_code in REJECTED_STATUSES:
+                return f"HTTP {response.status_code}", "rejected"
+            if response.status_code in BLOCKED_STATUSES:
+                return f"HTTP {response.status_code}", "blocked"
+            return f"HTTP {response.status_code}", "retry"
+        return None, None
+
+    def _mark(self, event: OutboxEvent, error, kind, now: datetime):
+        if error is None:
+            event.delivered_at = now
+            event.last_error = None
+            OUTBOX_DELIVERED.inc()
+            return
+        event.last_error = error[:255]
+        if kind == "blocked":
+            event.next_attempt_at = now + timedelta(seconds=OUTBOX_BLOCKED_RETRY)
+            return
+        event.attempts += 1
+        OUTBOX_FAILED.inc()
+        if kind == "rejected" or event.attempts >= OUTBOX_MAX_ATTEMPTS:
+            # Cola de muertos: el evento queda guardado para revisarlo a mano
+            event.failed_at = now
+            OUTBOX_DEAD.inc()
+            logger.error("Evento del outbox descartado", extra={
+                "event_id": event.id,
+                "attempts": event.attempts,
+                "error": error,
+            })
+        else:
+            event.next_attempt_at = now + timedelta(seconds=backoff(event.attempts))
+
+    async def dispatch_once(self):
+        async with Session() as db:
+            now = datetime.utcnow()
+            events = (await db.scalars(
+                select(OutboxEvent)
+                .where(
+                    OutboxEvent.delivered_at.is_(None),
+                    OutboxEvent.failed_at.is_(None),
+                    OutboxEvent.next_attempt_at <= now,
+                )
+                .order_by(OutboxEvent.id)
+                .limit(OUTBOX_BATCH_SIZE)
+            )).all()
+            if not events:
+                return 0
+            error, kind = await self._deliver(events)
+            if kind == "rejected" and len(events) > 1:
+                # Un registro rechazado no debe bloquear al resto del lote:
+                # se reenvían uno a uno para aislarlo
+                results = [(event, *await self._deliver([event])) for event in events]
+            else:
+                results = [(event, error, kind) for event in events]
+            failed = [result for result in results if result[1] is not None]
+            if kind == "blocked":
+                OUTBOX_BLOCKED.inc(amount=len(events))
+                logger.error("users_service rechaza la sincronización; revisar INTERNAL_SYNC_TOKEN", extra={
+                    "events": len(events),
+                    "error": error,
+                })
+            elif failed:
+                logger.warning("Fallo al entregar eventos del outbox", extra={
+                    "events": len(failed),
+                    "error": failed[0][1],
+                })
+            now = datetime.utcnow()
+            for event, error, kind in results:
+                self._mark(event, error, kind, now)
+            await db.commit()
+            return len(events)
+
+outbox_dispatcher = OutboxDispatcher()
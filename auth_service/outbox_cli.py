@@ -0,0 +1,43 @@
+import sys
+from datetime import datetime
+from sqlalchemy import select, update
+from database import engine
+from models import OutboxEvent
+
+# Uso: python outbox_cli.py                lista los eventos en la cola de muertos
+#      python outbox_cli.py requeue        vuelve a encolar todos los eventos muertos
+#      python outbox_cli.py requeue 12 15  vuelve a encolar solo esos ids
+# El despachador los recoge en su siguiente ronda (OUTBOX_POLL_INTERVAL)
+
+
+def dead_events(conn):
+    return conn.execute(
+        select(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.attempts, OutboxEvent.failed_at, OutboxEvent.last_error)
+        .where(OutboxEvent.failed_at.is_not(None))
+        .order_by(OutboxEvent.id)
+    ).all()
+
+
+def requeue(conn, ids: list[int] | None = None):
+    stmt = (
+        update(OutboxEvent)
+        .where(OutboxEvent.failed_at.is_not(None))
+        .values(failed_at=None, attempts=0, next_attempt_at=datetime.utcnow())
+    )
+    if ids:
+        stmt = stmt.where(OutboxEvent.id.in_(ids))
+    return conn.execute(stmt).rowcount
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "requeue":
+        with engine.begin() as conn:
+            count = requeue(conn, [int(arg) for arg in sys.argv[2:]])
+        print(f"Eventos reencolados: {count}")
+    else:
+        with engine.connect() as conn:
+            rows = dead_events(conn)
+        for row in rows:
+            print(f"{row.id:>6}  {row.event_type:<15} {row.attempts:>3}  {row.failed_at}  {row.last_error}")
+        if not rows:
+            print("No hay eventos en la cola de muertos")
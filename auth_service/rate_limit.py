@@ -0,0 +1,133 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from metrics import Counter
+
+# Token buckets: cada llave recibe RATE tokens por segundo hasta BURST y
+# cada intento consume uno. Se comprueban antes de tocar la base de datos o
+# bcrypt, que es justo el trabajo que un ataque de fuerza bruta quiere forzar
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "1"))
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", "0.1"))
+LOGIN_EMAIL_BURST = float(os.getenv("LOGIN_EMAIL_BURST", "5"))
+REGISTER_IP_RATE = float(os.getenv("REGISTER_IP_RATE", "0.2"))
+REGISTER_IP_BURST = float(os.getenv("REGISTER_IP_BURST", "5"))
+
+# "memory": por proceso; "redis": compartido entre workers e instancias
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Número de proxies propios delante del servicio (Render pone uno). La IP
+# del cliente es la que añadió el último de ellos en X-Forwarded-For; las
+# entradas anteriores las controla el cliente y no sirven como llave
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+
+RATE_LIMITED = Counter("rate_limited_total", "Peticiones rechazadas por límite de tasa", ("scope",))
+
+
+class InMemoryBackend:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: float):
+        # Devuelve 0 si hay token, o los segundos que faltan para el siguiente
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # Un bucket expulsado vuelve lleno: con suficientes llaves distintas
+        # un atacante lo puede forzar, por eso el límite es generoso
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisBackend:
+    # El bucket se actualiza en un script Lua para que sea atómico entre
+    # procesos. Acepta cualquier cliente con la interfaz de redis.asyncio
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    async def acquire(self, key: str, rate: float, burst: float):
+        wait = await self._script(keys=[self.prefix + key], args=[rate, burst, time.time()])
+        return float(wait)
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def check(self, scope: str, ident: str, rate: float, burst: float):
+        if rate <= 0:
+            return
+        wait = await self.backend.acquire(f"{scope}:{ident}", rate, burst)
+        if wait > 0:
+            RATE_LIMITED.inc(scope)
+            raise HTTPException(
+                status_code=429,
+                detail="Demasiados intentos, intenta de nuevo más tarde",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+
+def _create_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requiere el paquete 'redis'")
+        return RedisBackend(redis.from_url(REDIS_URL))
+    return InMemoryBackend(RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(_create_backend())
+
+
+def client_ip(request: Request):
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(forwarded) >= RATE_LIMIT_PROXY_HOPS:
+            return forwarded[-RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+async def login_ip_limit(request: Request):
+    await rate_limiter.check("login_ip", client_ip(request), LOGIN_IP_RATE, LOGIN_IP_BURST)
+
+
+async def register_ip_limit(request: Request):
+    await rate_limiter.check("register_ip", client_ip(request), REGISTER_IP_RATE, REGISTER_IP_BURST)
+
+
+async def login_email_limit(email: str):
+    await rate_limiter.check("login_email", email.strip().lower(), LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST)
@@ -1,38 +1,35 @@
 # routes.py
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import User, UserCreate, UserLogin, UserPublic
 from utils import hash_password, verify_password, create_access_token, verify_token
-import httpx
+from hashing import hashing_pool
+from outbox import add_event, outbox_dispatcher
+from rate_limit import login_email_limit, login_ip_limit, register_ip_limit
 router = APIRouter()
 
-USERS_URL = "https://fastapi-render-1-qqwg.onrender.com/sync_user"
-
-@router.post("/register")
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    user_existe = db.query(User).filter(User.email == user.email).first()
+@router.post("/register", dependencies=[Depends(register_ip_limit)])
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    user_existe = await db.scalar(select(User).where(User.email == user.email))
     if user_existe:
         raise HTTPException(status_code=400, detail="El usuario ya existe")
 
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hashing_pool.run(hash_password, user.password)
     new_user = User(email=user.email, password=hashed_pw, role=user.role)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    async with httpx.AsyncClient() as client:
-        try:
-            await client.post(
-                USERS_URL,
-                json={
-                    "email": new_user.email,
-                    "role": new_user.role,
-                    "id": new_user.id
-                },
-                timeout=5.0
-            )
-        except httpx.RequestError:
-            print("⚠No se pudo conectar con el microservicio de Users")
+    await db.flush()
+    # La sincronización con users_service se guarda en la misma transacción
+    # y la entrega el despachador del outbox fuera de la petición
+    add_event(db, "user.created", {
+        "email": new_user.email,
+        "role": new_user.role,
+        "id": new_user.id
+    })
+    await db.commit()
+    await db.refresh(new_user)
+    outbox_dispatcher.notify()
 
     return {
         "message": "Usuario creado exitosamente",
@@ -43,15 +40,17 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         }
     }
 
-@router.post("/login")
-def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
+@router.post("/login", dependencies=[Depends(login_ip_limit)])
+async def login_user(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     email = credentials.email
     password = credentials.password
     if not email or not password:
         raise HTTPException(status_code=400, detail="Faltan campos obligatorios (email o password)")
+    # Límite por cuenta: frena la fuerza bruta distribuida entre muchas IPs
+    await login_email_limit(email)
 
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user or not await hashing_pool.run(verify_password, password, user.password):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     token = create_access_token({
@@ -64,13 +63,10 @@ def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserPublic)
-def get_current_user(
-    request: Request,
+async def get_current_user(
     authorization: str = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Mostrar todos los headers para depuración
-    print("HEADERS RECIBIDOS:", dict(request.headers))
     if not authorization:
         raise HTTPException(status_code=401, detail="Token no proporcionado")
     if not authorization.startswith("Bearer "):
@@ -79,7 +75,7 @@ def get_current_user(
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
-    user = db.query(User).filter(User.email == payload.get("sub")).first()
+    user = await db.scalar(select(User).where(User.email == payload.get("sub")))
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
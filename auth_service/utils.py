@@ -1,28 +1,46 @@
+import os
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 
-SECRET_KEY = "1020112998"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 15
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "1020112998")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Con algoritmos asimétricos se firma con la llave privada y los demás
+# servicios verifican localmente con JWT_PUBLIC_KEY
+PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY")
+PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+# Costo de bcrypt (log2 de iteraciones); cada +1 duplica el tiempo de hash
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib y python-jose se importan en el primer uso para no alargar el arranque
+_pwd_context = None
+
+def pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd_context
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
+
+def _is_asymmetric():
+    return ALGORITHM.startswith(("RS", "ES", "PS"))
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    from jose import jwt
+    return jwt.encode(to_encode, PRIVATE_KEY if _is_asymmetric() else SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_token(token: str):
+    from jose import jwt, JWTError
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, PUBLIC_KEY if _is_asymmetric() else SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
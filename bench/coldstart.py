@@ -0,0 +1,83 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from run import ROOT, SERVICES, free_port, migrate_service, service_env
+
+# Mide el arranque en frío de cada servicio: desde que se lanza el proceso
+# hasta la primera respuesta de GET /, y el tiempo de la primera visita a
+# /openapi.json. Uso: python bench/coldstart.py --runs 5 [--prebuilt-openapi]
+
+
+def first_response(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("El servicio terminó al arrancar")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.01)
+    raise RuntimeError(f"Sin respuesta de {url}")
+
+
+def measure(name: str, workdir: str, ports: dict, schema_path: str | None):
+    env = service_env(name, workdir, ports)
+    if schema_path:
+        env["OPENAPI_SCHEMA_PATH"] = schema_path
+    base = f"http://127.0.0.1:{ports[name]}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(ports[name]),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.join(ROOT, f"{name}_service"),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        first_response(f"{base}/", process)
+        ready = time.perf_counter() - started
+        openapi_started = time.perf_counter()
+        httpx.get(f"{base}/openapi.json", timeout=30).raise_for_status()
+        openapi = time.perf_counter() - openapi_started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return ready, openapi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de los servicios")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--prebuilt-openapi", action="store_true", help="Sirve el esquema generado con export_openapi.py")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="coldstart-") as workdir:
+        ports = {name: free_port() for name in SERVICES}
+        print(f"{'servicio':<10} {'1ª respuesta ms':>16} {'openapi ms':>11}  (mediana de {args.runs})")
+        for name in SERVICES:
+            migrate_service(name, workdir, ports)
+            schema_path = None
+            if args.prebuilt_openapi:
+                schema_path = os.path.join(workdir, f"openapi-{name}.json")
+                subprocess.run(
+                    [sys.executable, "export_openapi.py", schema_path],
+                    cwd=os.path.join(ROOT, f"{name}_service"),
+                    env={**service_env(name, workdir, ports), "PYTHONWARNINGS": "ignore"},
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+            samples = [measure(name, workdir, ports, schema_path) for _ in range(args.runs)]
+            ready = statistics.median(sample[0] for sample in samples) * 1000
+            openapi = statistics.median(sample[1] for sample in samples) * 1000
+            print(f"{name:<10} {ready:>16.1f} {openapi:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
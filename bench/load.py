@@ -0,0 +1,66 @@
+import asyncio
+import time
+from collections import defaultdict
+import httpx
+
+
+def percentile(values: list[float], p: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.elapsed = 0.0
+
+    async def call(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, ok=(200, 201, 207), **kwargs):
+        # endpoint es la plantilla de la ruta (GET /products/{id}), no la URL
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code not in ok:
+            self.errors[endpoint] += 1
+        return response
+
+    def summary(self):
+        rows = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            rows[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "rps": round(len(values) / self.elapsed, 1) if self.elapsed else 0.0,
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        return rows
+
+
+async def run_load(step, duration: float, concurrency: int):
+    # step(client, recorder, worker_id) ejecuta una iteración del escenario;
+    # cada worker la repite en bucle cerrado hasta agotar la duración
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            iteration = 0
+            while time.perf_counter() < deadline:
+                await step(client, recorder, worker_id, iteration)
+                iteration += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        recorder.elapsed = time.perf_counter() - start
+    return recorder.summary()
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from passlib.context import CryptContext
+from load import run_load
+from scenarios import SCENARIOS
+from seed import BENCH_PASSWORD, bench_email, seed_auth, seed_orders, seed_products, seed_users
+
+# Levanta los cuatro servicios en local con bases SQLite temporales, las
+# llena y ejecuta los escenarios de carga. Uso desde la raíz del repo:
+#   python bench/run.py --duration 20 --concurrency 32 --output base.json
+#   python bench/run.py --baseline base.json
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ("auth", "users", "products", "orders")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def service_env(name: str, workdir: str, ports: dict):
+    urls = {service: f"http://127.0.0.1:{port}" for service, port in ports.items()}
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, name)}.db",
+        "JWT_SECRET_KEY": env.get("JWT_SECRET_KEY", "bench-secret"),
+        "SERVICE_AUTH_URLS": urls["auth"],
+        "SERVICE_USERS_URLS": urls["users"],
+        "SERVICE_PRODUCTS_URLS": urls["products"],
+        "PRODUCT_EVENT_WEBHOOKS": f"{urls['orders']}/internal/product-events",
+        "TRACE_FILE": os.path.join(workdir, f"traces-{name}.jsonl"),
+        "INTERNAL_SYNC_TOKEN": env.get("INTERNAL_SYNC_TOKEN", "bench-sync-token"),
+        "INTERNAL_EVENTS_TOKEN": env.get("INTERNAL_EVENTS_TOKEN", "bench-events-token"),
+    })
+    # El login storm mide bcrypt, no el limitador: sin límites salvo que se pidan
+    for key in ("LOGIN_IP_RATE", "LOGIN_EMAIL_RATE", "REGISTER_IP_RATE"):
+        env.setdefault(key, "0")
+    return env
+
+
+def migrate_service(name: str, workdir: str, ports: dict):
+    subprocess.run(
+        [sys.executable, "migrate.py"],
+        cwd=os.path.join(ROOT, f"{name}_service"),
+        env={**service_env(name, workdir, ports), "PYTHONWARNINGS": "ignore"},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def start_service(name: str, workdir: str, ports: dict):
+    log = open(os.path.join(workdir, f"{name}.log"), "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(ports[name]), "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.join(ROOT, f"{name}_service"),
+        env=service_env(name, workdir, ports),
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_ready(urls: dict, processes: dict, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    pending = set(urls)
+    while pending:
+        for name in list(pending):
+            if processes[name].poll() is not None:
+                raise RuntimeError(f"{name}_service terminó al arrancar (ver {name}.log)")
+            try:
+                if httpx.get(f"{urls[name]}/", timeout=1).status_code == 200:
+                    pending.discard(name)
+            except httpx.HTTPError:
+                pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Servicios sin responder: {', '.join(sorted(pending))}")
+        time.sleep(0.2)
+
+
+def login(auth_url: str, email: str):
+    response = httpx.post(f"{auth_url}/login", json={"email": email, "password": BENCH_PASSWORD}, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def print_report(results: dict, baseline: dict | None):
+    header = f"{'escenario':<10} {'endpoint':<28} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'Δrps':>8} {'Δp95':>8}"
+    print(header)
+    print("-" * len(header))
+    for scenario, rows in results.items():
+        for endpoint, row in rows.items():
+            line = (f"{scenario:<10} {endpoint:<28} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8} "
+                    f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+            base = (baseline or {}).get(scenario, {}).get(endpoint)
+            if base:
+                line += f" {_delta(row['rps'], base['rps']):>8} {_delta(row['p95_ms'], base['p95_ms']):>8}"
+            print(line)
+
+
+def _delta(current: float, previous: float):
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los microservicios")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Escenarios separados por coma")
+    parser.add_argument("--duration", type=float, default=15, help="Segundos por escenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes concurrentes")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos y de la carga")
+    parser.add_argument("--output", help="Guarda los resultados en JSON")
+    parser.add_argument("--baseline", help="JSON de una ejecución previa para comparar")
+    parser.add_argument("--keep", action="store_true", help="Conserva el directorio temporal (bases y logs)")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    ports = {name: free_port() for name in SERVICES}
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    processes = {}
+    try:
+        # Esquema con las migraciones de cada servicio, datos y después los servicios
+        for name in SERVICES:
+            migrate_service(name, workdir, ports)
+        rng = random.Random(args.seed)
+        rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        password_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(BENCH_PASSWORD)
+        seed_auth(os.path.join(workdir, "auth.db"), args.users, password_hash)
+        seed_users(os.path.join(workdir, "users.db"), args.users)
+        seed_products(os.path.join(workdir, "products.db"), args.products, rng)
+        seed_orders(os.path.join(workdir, "orders.db"), args.orders, args.products, rng)
+        for name in SERVICES:
+            processes[name] = start_service(name, workdir, ports)
+        wait_ready(urls, processes)
+
+        tokens = {
+            "admin": login(urls["auth"], "admin@bench.local"),
+            "cliente": login(urls["auth"], bench_email(1)),
+            "internal": service_env("users", workdir, ports)["INTERNAL_SYNC_TOKEN"],
+        }
+        volumes = {"users": args.users, "products": args.products, "orders": args.orders}
+        print(f"Datos: {args.users} usuarios, {args.products} productos, {args.orders} pedidos; "
+              f"{args.concurrency} clientes, {args.duration:g}s por escenario\n")
+
+        results = {}
+        for name in scenarios:
+            scenario = SCENARIOS[name](urls, tokens, volumes, args.seed)
+            results[name] = asyncio.run(run_load(scenario.step, args.duration, args.concurrency))
+
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as fh:
+                baseline = json.load(fh)["results"]
+        print_report(results, baseline)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as fh:
+                json.dump({"args": vars(args), "results": results}, fh, indent=2)
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait(timeout=10)
+        if args.keep:
+            print(f"\nDirectorio de trabajo: {workdir}")
+        else:
+            for entry in os.listdir(workdir):
+                os.remove(os.path.join(workdir, entry))
+            os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
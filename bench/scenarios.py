@@ -0,0 +1,92 @@
+import random
+from seed import BENCH_PASSWORD, bench_email
+
+
+class Scenario:
+    def __init__(self, urls: dict, tokens: dict, volumes: dict, seed: int):
+        self.urls = urls
+        self.tokens = tokens
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+
+    def auth(self, role: str):
+        return {"Authorization": f"Bearer {self.tokens[role]}"}
+
+
+class LoginStorm(Scenario):
+    # Muchos logins concurrentes: mide el coste de bcrypt y del pool de hashing
+    name = "login"
+
+    async def step(self, client, recorder, worker_id, iteration):
+        email = bench_email(self.rng.randint(1, self.volumes["users"]))
+        await recorder.call(
+            client, "POST /login", "POST", f"{self.urls['auth']}/login",
+            json={"email": email, "password": BENCH_PASSWORD},
+        )
+
+
+class CatalogBrowse(Scenario):
+    # Navegación típica: listado paginado, detalle y consulta en lote
+    name = "catalog"
+
+    async def step(self, client, recorder, worker_id, iteration):
+        base = self.urls["products"]
+        headers = self.auth("cliente")
+        choice = self.rng.random()
+        if choice < 0.3:
+            after = self.rng.randint(0, self.volumes["products"])
+            await recorder.call(client, "GET /products", "GET", f"{base}/products",
+                                params={"limit": 50, "after": after}, headers=headers)
+        elif choice < 0.85:
+            product_id = self.rng.randint(1, self.volumes["products"])
+            await recorder.call(client, "GET /products/{id}", "GET", f"{base}/products/{product_id}", headers=headers)
+        else:
+            ids = ",".join(str(self.rng.randint(1, self.volumes["products"])) for _ in range(20))
+            await recorder.call(client, "GET /products/lookup", "GET", f"{base}/products/lookup",
+                                params={"ids": ids}, headers=headers)
+
+
+class OrderCreate(Scenario):
+    # Creación de pedidos: incluye la llamada de orders_service a products
+    name = "orders"
+
+    async def step(self, client, recorder, worker_id, iteration):
+        base = self.urls["orders"]
+        headers = self.auth("cliente")
+        choice = self.rng.random()
+        if choice < 0.7:
+            await recorder.call(client, "POST /orders", "POST", f"{base}/orders", headers=headers, json={
+                "producto_id": self.rng.randint(1, self.volumes["products"]),
+                "cantidad": self.rng.randint(1, 5),
+            })
+        elif choice < 0.85:
+            items = [
+                {"producto_id": self.rng.randint(1, self.volumes["products"]), "cantidad": 1}
+                for _ in range(10)
+            ]
+            await recorder.call(client, "POST /orders/batch", "POST", f"{base}/orders/batch",
+                                headers=headers, json={"items": items})
+        elif choice < 0.95:
+            await recorder.call(client, "GET /orders", "GET", f"{base}/orders",
+                                params={"limit": 50}, headers=headers)
+        else:
+            await recorder.call(client, "GET /orders/stats/products", "GET", f"{base}/orders/stats/products",
+                                params={"limit": 20}, headers=self.auth("admin"))
+
+
+class UserSync(Scenario):
+    # Sincronización masiva: mezcla de usuarios nuevos y existentes
+    name = "sync"
+    batch_size = 100
+
+    async def step(self, client, recorder, worker_id, iteration):
+        start = self.rng.randint(1, self.volumes["users"] * 2)
+        users = [
+            {"id": i + 1, "email": bench_email(i), "role": "cliente"}
+            for i in range(start, start + self.batch_size)
+        ]
+        await recorder.call(client, "POST /sync_users", "POST", f"{self.urls['users']}/sync_users",
+                            json={"users": users}, headers={"X-Internal-Token": self.tokens["internal"]})
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (LoginStorm, CatalogBrowse, OrderCreate, UserSync)}
@@ -0,0 +1,88 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+# Volúmenes por defecto: del orden de lo que maneja el despliegue real
+BENCH_PASSWORD = "bench-password"
+PALABRAS = [
+    "hamburguesa", "pizza", "arepa", "empanada", "taco", "burrito", "sushi", "ensalada",
+    "sandwich", "perro", "pollo", "bandeja", "jugo", "limonada", "cafe", "postre",
+]
+
+
+def bench_email(i: int):
+    return f"user{i}@bench.local"
+
+
+def _connect(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def seed_auth(path: str, users: int, password_hash: str):
+    # Todos los usuarios comparten contraseña (y hash): generar miles de
+    # hashes bcrypt tardaría más que el propio benchmark
+    with _connect(path) as conn:
+        conn.execute("INSERT INTO users (id, email, password, role) VALUES (1, 'admin@bench.local', ?, 'admin')", (password_hash,))
+        conn.executemany(
+            "INSERT INTO users (id, email, password, role) VALUES (?, ?, ?, 'cliente')",
+            ((i + 1, bench_email(i), password_hash) for i in range(1, users + 1)),
+        )
+
+
+def seed_users(path: str, users: int):
+    with _connect(path) as conn:
+        conn.execute("INSERT INTO users (id, email, role) VALUES (1, 'admin@bench.local', 'admin')")
+        conn.executemany(
+            "INSERT INTO users (id, email, role) VALUES (?, ?, 'cliente')",
+            ((i + 1, bench_email(i)) for i in range(1, users + 1)),
+        )
+
+
+def seed_products(path: str, products: int, rng: random.Random):
+    now = datetime.utcnow().isoformat(sep=" ")
+    with _connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO products (id, nombre, precio, descripcion, version, updated_at) VALUES (?, ?, ?, ?, 1, ?)",
+            (
+                (
+                    i,
+                    f"{rng.choice(PALABRAS)} {rng.choice(PALABRAS)} {i}",
+                    round(rng.uniform(2000, 80000), 2),
+                    f"Producto de prueba {i}",
+                    now,
+                )
+                for i in range(1, products + 1)
+            ),
+        )
+
+
+def seed_orders(path: str, orders: int, products: int, rng: random.Random, days: int = 90):
+    # Pedidos repartidos en los últimos `days` días
+    now = datetime.utcnow()
+    with _connect(path) as conn:
+        rows = []
+        for i in range(1, orders + 1):
+            producto_id = rng.randint(1, products)
+            precio = round(rng.uniform(2000, 80000), 2)
+            cantidad = rng.randint(1, 5)
+            created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+            rows.append((i, producto_id, f"producto {producto_id}", precio, cantidad, precio * cantidad,
+                         created_at.isoformat(sep=" ")))
+        conn.executemany(
+            "INSERT INTO orders (id, producto_id, producto, precio, cantidad, total, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        # Los agregados de ventas se mantienen al crear pedidos por la API;
+        # para los sembrados se calculan igual que en la migración
+        conn.execute(
+            "INSERT INTO product_sales (producto_id, producto, orders_count, units, revenue, last_order_at) "
+            "SELECT producto_id, MAX(producto), COUNT(*), SUM(cantidad), SUM(total), MAX(created_at) "
+            "FROM orders GROUP BY producto_id"
+        )
+        conn.execute(
+            "INSERT INTO daily_sales (day, orders_count, units, revenue) "
+            "SELECT DATE(created_at), COUNT(*), SUM(cantidad), SUM(total) FROM orders GROUP BY DATE(created_at)"
+        )
@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from urllib.parse import urlsplit
+import httpx
+
+# Dirección de cada servicio del que depende este proceso. Orden de
+# prioridad: SERVICE_<NOMBRE>_URLS (lista separada por comas, p. ej.
+# SERVICE_AUTH_URLS=http://10.0.0.5:8000,http://10.0.0.6:8000), el archivo
+# JSON de SERVICE_REGISTRY_FILE ({"auth": ["http://..."]}) y por último la
+# URL pública de Render
+DEFAULT_URLS = {
+    "auth": "https://fastapi-render-f2yz.onrender.com",
+    "products": "https://fastapi-render-2-ldsm.onrender.com",
+}
+REGISTRY_FILE = os.getenv("SERVICE_REGISTRY_FILE")
+REGISTRY_REFRESH = float(os.getenv("SERVICE_REGISTRY_REFRESH", "5"))
+# Una instancia con DISCOVERY_EJECT_AFTER fallos seguidos (error de conexión
+# o 5xx) deja de recibir tráfico durante DISCOVERY_EJECT_SECONDS
+EJECT_AFTER = int(os.getenv("DISCOVERY_EJECT_AFTER", "3"))
+EJECT_SECONDS = float(os.getenv("DISCOVERY_EJECT_SECONDS", "30"))
+
+ENV_URLS = {
+    key[len("SERVICE_"):-len("_URLS")].lower(): [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+    for key, value in os.environ.items()
+    if key.startswith("SERVICE_") and key.endswith("_URLS")
+}
+
+
+def origin(url) -> str:
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._file_urls = {}
+        self._file_mtime = None
+        self._checked_at = 0.0
+        self._next = {}
+        self._failures = {}
+        self._ejected_until = {}
+
+    def _refresh_file(self):
+        # El archivo se relee sólo si cambió, como mucho cada REGISTRY_REFRESH
+        now = time.monotonic()
+        if not REGISTRY_FILE or now - self._checked_at < REGISTRY_REFRESH:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(REGISTRY_FILE).st_mtime
+            if mtime == self._file_mtime:
+                return
+            with open(REGISTRY_FILE, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            # Si el archivo desaparece o está a medio escribir se conserva
+            # la última versión válida
+            return
+        self._file_mtime = mtime
+        self._file_urls = {
+            name: [url.rstrip("/") for url in ([urls] if isinstance(urls, str) else urls)]
+            for name, urls in data.items()
+        }
+
+    def instances(self, service: str) -> list[str]:
+        self._refresh_file()
+        return ENV_URLS.get(service) or self._file_urls.get(service) or [DEFAULT_URLS[service]]
+
+    def pick(self, service: str) -> str:
+        # Round-robin entre las instancias sanas; si todas están expulsadas
+        # se prueba con todas antes que fallar sin intentarlo
+        instances = self.instances(service)
+        now = time.monotonic()
+        healthy = [url for url in instances if self._ejected_until.get(url, 0) <= now] or instances
+        position = self._next.get(service, 0)
+        self._next[service] = position + 1
+        return healthy[position % len(healthy)]
+
+    def url(self, service: str, path: str = "") -> str:
+        return self.pick(service) + path
+
+    def report(self, instance: str, ok: bool):
+        if ok:
+            self._failures.pop(instance, None)
+            return
+        failures = self._failures.get(instance, 0) + 1
+        if failures >= EJECT_AFTER:
+            self._ejected_until[instance] = time.monotonic() + EJECT_SECONDS
+            failures = 0
+        self._failures[instance] = failures
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "instances": sum(len(self.instances(service)) for service in DEFAULT_URLS),
+            "ejected": sum(1 for until in self._ejected_until.values() if until > now),
+        }
+
+
+registry = ServiceRegistry()
+
+
+def service_url(service: str, path: str = "") -> str:
+    return registry.url(service, path)
+
+
+class DiscoveryTransport(httpx.AsyncBaseTransport):
+    # Informa al registro del resultado de cada llamada para expulsar las
+    # instancias que fallan
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        instance = origin(request.url)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            registry.report(instance, False)
+            raise
+        registry.report(instance, response.status_code < 500)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
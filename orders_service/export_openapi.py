@@ -0,0 +1,11 @@
+import json
+import sys
+from main import build_openapi
+
+# Genera el esquema OpenAPI para servirlo con OPENAPI_SCHEMA_PATH sin
+# construirlo en el proceso. Uso: python export_openapi.py [ruta]
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "openapi.json"
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(build_openapi(), fh, ensure_ascii=False)
+    print(f"Esquema OpenAPI escrito en {path}")
@@ -0,0 +1,17 @@
+import sys
+from migrations import MIGRATIONS, applied_versions, run_migrations
+
+# Uso: python migrate.py          aplica las migraciones pendientes
+#      python migrate.py status   muestra cuáles están aplicadas
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        done = applied_versions()
+        for version, description, _ in MIGRATIONS:
+            applied_at = done[version].applied_at if version in done else "pendiente"
+            print(f"{version:>4}  {description:<50} {applied_at}")
+    else:
+        applied = run_migrations()
+        for version, description in applied:
+            print(f"Aplicada {version}: {description}")
+        if not applied:
+            print("El esquema ya está al día")
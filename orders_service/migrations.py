@@ -0,0 +1,145 @@
+import os
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from database import engine
+
+# Migraciones versionadas del esquema. Por defecto se aplican al arrancar la
+# app: el despliegue en Render es de un solo worker y no tiene paso previo.
+# Con varios workers, poner RUN_MIGRATIONS_ON_STARTUP=false y ejecutar
+# "python migrate.py" antes de arrancarlos
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# Cada migración describe las tablas tal como quedaron en su versión y no
+# lee los modelos: si lo hiciera, cambiaría con cada edición posterior.
+# Las operaciones son idempotentes porque las bases existentes (creadas con
+# create_all antes de versionar el esquema) pueden tener ya parte del cambio
+def add_column(conn, table_name: str, column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name not in existing:
+        ddl = CreateColumn(column).compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+
+
+def create_index(conn, name: str, table_name: str, *column_names):
+    table = Table(table_name, MetaData(), *(Column(column_name) for column_name in column_names))
+    Index(name, *table.columns).create(bind=conn, checkfirst=True)
+
+
+def initial_schema(conn):
+    # Esquema de la primera versión desplegada
+    orders = Table(
+        "orders",
+        MetaData(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("producto", String, nullable=False),
+        Column("precio", Float, nullable=False),
+        Column("cantidad", Integer, nullable=False),
+        Column("total", Float, nullable=False),
+    )
+    orders.create(bind=conn, checkfirst=True)
+
+
+def order_product_and_timestamp(conn):
+    add_column(conn, "orders", Column("producto_id", Integer, nullable=True))
+    add_column(conn, "orders", Column("created_at", DateTime, nullable=True))
+    create_index(conn, "ix_orders_producto_id", "orders", "producto_id")
+    create_index(conn, "ix_orders_created_at", "orders", "created_at")
+
+
+def sales_aggregates(conn):
+    metadata = MetaData()
+    orders = Table(
+        "orders",
+        metadata,
+        Column("producto_id", Integer),
+        Column("producto", String),
+        Column("cantidad", Integer),
+        Column("total", Float),
+        Column("created_at", DateTime),
+    )
+    product_sales = Table(
+        "product_sales",
+        metadata,
+        Column("producto_id", Integer, primary_key=True),
+        Column("producto", String, nullable=False),
+        Column("orders_count", Integer, nullable=False),
+        Column("units", Integer, nullable=False),
+        Column("revenue", Float, nullable=False),
+        Column("last_order_at", DateTime, nullable=True),
+    )
+    daily_sales = Table(
+        "daily_sales",
+        metadata,
+        Column("day", Date, primary_key=True),
+        Column("orders_count", Integer, nullable=False),
+        Column("units", Integer, nullable=False),
+        Column("revenue", Float, nullable=False),
+    )
+    for table in (product_sales, daily_sales):
+        table.create(bind=conn, checkfirst=True)
+        conn.execute(table.delete())
+
+    # Carga inicial desde orders. Los pedidos anteriores a la migración 2 no
+    # tienen producto ni fecha y no se pueden atribuir
+    product_rows = (
+        select(
+            orders.c.producto_id,
+            func.max(orders.c.producto),
+            func.count(),
+            func.sum(orders.c.cantidad),
+            func.sum(orders.c.total),
+            func.max(orders.c.created_at),
+        )
+        .where(orders.c.producto_id.is_not(None))
+        .group_by(orders.c.producto_id)
+    )
+    conn.execute(product_sales.insert().from_select(
+        ["producto_id", "producto", "orders_count", "units", "revenue", "last_order_at"], product_rows
+    ))
+    day = func.date(orders.c.created_at)
+    daily_rows = (
+        select(day, func.count(), func.sum(orders.c.cantidad), func.sum(orders.c.total))
+        .where(orders.c.created_at.is_not(None))
+        .group_by(day)
+    )
+    conn.execute(daily_sales.insert().from_select(["day", "orders_count", "units", "revenue"], daily_rows))
+
+
+MIGRATIONS = [
+    (1, "Esquema inicial", initial_schema),
+    (2, "orders.producto_id y orders.created_at con índices", order_product_and_timestamp),
+    (3, "Tablas de agregados de ventas con carga inicial", sales_aggregates),
+]
+
+def applied_versions(bind=engine):
+    schema_version.create(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        return {row.version: row for row in conn.execute(schema_version.select())}
+
+
+def run_migrations(bind=engine):
+    # Cada migración va en su propia transacción junto con su registro en
+    # schema_version; si dos procesos coinciden, la clave primaria hace
+    # fallar al segundo en lugar de aplicarla dos veces
+    done = applied_versions(bind)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        applied.append((version, description))
+    return applied
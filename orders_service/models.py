@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float
+import os
+from datetime import date, datetime
+from sqlalchemy import Column, Date, DateTime, Integer, String, Float
 from pydantic import BaseModel, Field
 from database import Base
 
+MAX_ORDER_BATCH_SIZE = int(os.getenv("MAX_ORDER_BATCH_SIZE", "100"))
+
 class Order(Base):
     __tablename__ = "orders"
 
@@ -10,6 +14,31 @@ class Order(Base):
     precio = Column(Float, nullable=False)
     cantidad = Column(Integer, nullable=False)
     total = Column(Float, nullable=False)
+    # Nulos en los pedidos anteriores a la migración 2
+    producto_id = Column(Integer, nullable=True, index=True)
+    created_at = Column(DateTime, nullable=True, default=datetime.utcnow, index=True)
+
+
+# Agregados mantenidos en la misma transacción que crea los pedidos: los
+# reportes leen una fila por producto o por día, no todos los pedidos
+class ProductSales(Base):
+    __tablename__ = "product_sales"
+
+    producto_id = Column(Integer, primary_key=True)
+    producto = Column(String, nullable=False)
+    orders_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    last_order_at = Column(DateTime, nullable=True)
+
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
 
 
 # Pydantic schemas
@@ -18,12 +47,66 @@ class OrderCreate(BaseModel):
     cantidad: int = Field(..., gt=0, le=100, description="Cantidad solicitada")
 
 
+class OrderBatchCreate(BaseModel):
+    items: list[OrderCreate] = Field(..., min_length=1, max_length=MAX_ORDER_BATCH_SIZE)
+
+
+class ProductEvent(BaseModel):
+    product_id: int
+    event: str = Field(..., description="updated o deleted")
+
+
 class OrderRead(BaseModel):
     id: int
     producto: str
     precio: float
     cantidad: int
     total: float
+    producto_id: int | None = None
+    created_at: datetime | None = None
 
     class Config:
         orm_mode = True
+
+
+class OrderLineResult(BaseModel):
+    producto_id: int
+    status_code: int
+    order: OrderRead | None = None
+    error: str | None = None
+
+
+class OrderBatchResult(BaseModel):
+    created: int
+    failed: int
+    results: list[OrderLineResult]
+
+
+class ProductSalesRead(BaseModel):
+    producto_id: int
+    producto: str
+    orders_count: int
+    units: int
+    revenue: float
+    last_order_at: datetime | None = None
+
+    class Config:
+        orm_mode = True
+
+
+class DailySalesRead(BaseModel):
+    day: date
+    orders_count: int
+    units: int
+    revenue: float
+
+    class Config:
+        orm_mode = True
+
+
+class SalesSummary(BaseModel):
+    orders_count: int
+    units: int
+    revenue: float
+    desde: date | None = None
+    hasta: date | None = None
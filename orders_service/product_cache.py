@@ -0,0 +1,18 @@
+import os
+from cache import TTLCache
+
+# Caché local de productos (nombre y precio) consultados a products_service
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "5000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "300"))
+# Tiempo extra durante el que se sirve un producto vencido mientras se
+# refresca en segundo plano (stale-while-revalidate)
+PRODUCT_CACHE_STALE_TTL = float(os.getenv("PRODUCT_CACHE_STALE_TTL", "60"))
+
+# Máximo de ids por llamada a POST /products/lookup (MAX_LOOKUP_IDS en products_service)
+PRODUCT_LOOKUP_CHUNK = int(os.getenv("PRODUCT_LOOKUP_CHUNK", "200"))
+
+# products_service debe enviarlo en X-Internal-Token; sin él el endpoint
+# de eventos responde 503
+INTERNAL_EVENTS_TOKEN = os.getenv("INTERNAL_EVENTS_TOKEN")
+
+product_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
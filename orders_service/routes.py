@@ -1,36 +1,57 @@
 # routes.py
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+import asyncio
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from models import Order, OrderCreate, OrderRead
+from models import (
+    DailySales, DailySalesRead, Order, OrderBatchCreate, OrderBatchResult, OrderCreate, OrderLineResult, OrderRead,
+    ProductEvent, ProductSales, ProductSalesRead, SalesSummary
+)
+from security import AUTH_MODE, extract_token, identity_cache, token_cache_key, token_ttl, user_from_token
+from discovery import service_url
+from http_client import get_http_client, request_options
+from pagination import PageParams, page_response, paginate
+from export import export_response
+from sales import record_sales
+from product_cache import INTERNAL_EVENTS_TOKEN, PRODUCT_CACHE_STALE_TTL, PRODUCT_LOOKUP_CHUNK, product_cache
 import httpx
 
 router = APIRouter()
 
-AUTH_URL = "https://fastapi-render-f2yz.onrender.com/me"
-PRODUCTS_URL = "https://fastapi-render-2-ldsm.onrender.com/products"
-
-
-async def get_current_user(authorization: str = Header(None)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Token no proporcionado")
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                AUTH_URL,
-                headers={"Authorization": authorization},
-                timeout=5.0
-            )
-        except httpx.RequestError:
-            raise HTTPException(
-                status_code=503,
-                detail="No se pudo conectar con el servicio de autenticación"
-            )
+
+async def load_user(authorization: str, client: httpx.AsyncClient):
+    if AUTH_MODE == "local":
+        return user_from_token(authorization)
+    try:
+        response = await client.get(
+            service_url("auth", "/me"),
+            headers={"Authorization": authorization},
+            **request_options("auth")
+        )
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=503,
+            detail="No se pudo conectar con el servicio de autenticación"
+        )
     if response.status_code != 200:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
     return response.json()
 
 
+async def get_current_user(
+        authorization: str = Header(None),
+        client: httpx.AsyncClient = Depends(get_http_client)
+):
+    token = extract_token(authorization)
+    return await identity_cache.get_or_load(
+        token_cache_key(token),
+        lambda: load_user(authorization, client),
+        ttl=token_ttl(token)
+    )
+
+
 async def cliente_required(user=Depends(get_current_user)):
     if user.get("role") not in ["admin", "cliente"]:
         raise HTTPException(
@@ -40,19 +61,27 @@ async def cliente_required(user=Depends(get_current_user)):
     return user
 
 
-async def get_product_info(product_id: int, authorization: str):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{PRODUCTS_URL}/{product_id}",
-                headers={"Authorization": authorization},
-                timeout=5.0
-            )
-        except httpx.RequestError:
-            raise HTTPException(
-                status_code=503,
-                detail="No se pudo conectar con el servicio de productos"
-            )
+async def admin_required(user=Depends(get_current_user)):
+    if user.get("role") != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Solo los administradores pueden realizar esta acción"
+        )
+    return user
+
+
+async def fetch_product(product_id: int, authorization: str, client: httpx.AsyncClient):
+    try:
+        response = await client.get(
+            service_url("products", f"/products/{product_id}"),
+            headers={"Authorization": authorization},
+            **request_options("products")
+        )
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=503,
+            detail="No se pudo conectar con el servicio de productos"
+        )
 
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
@@ -64,27 +93,82 @@ async def get_product_info(product_id: int, authorization: str):
     return response.json()
 
 
+async def get_product_info(product_id: int, authorization: str, client: httpx.AsyncClient):
+    return await product_cache.get_or_load(
+        product_id,
+        lambda: fetch_product(product_id, authorization, client),
+        stale_ttl=PRODUCT_CACHE_STALE_TTL
+    )
+
+
+async def fetch_products(product_ids: list[int], authorization: str, client: httpx.AsyncClient):
+    try:
+        response = await client.post(
+            service_url("products", "/products/lookup"),
+            json={"ids": product_ids},
+            headers={"Authorization": authorization},
+            **request_options("products", idempotent=True)
+        )
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=503,
+            detail="No se pudo conectar con el servicio de productos"
+        )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Error al obtener información de los productos"
+        )
+    return response.json()
+
+
+async def get_products_info(product_ids: list[int], authorization: str, client: httpx.AsyncClient):
+    # Devuelve {id: producto} o {id: HTTPException} si el producto no existe;
+    # los que no están en caché se piden en lote a products_service
+    products = {}
+    missing = []
+    for product_id in product_ids:
+        product = product_cache.get(product_id)
+        if product is None:
+            missing.append(product_id)
+        else:
+            products[product_id] = product
+    chunks = [missing[i:i + PRODUCT_LOOKUP_CHUNK] for i in range(0, len(missing), PRODUCT_LOOKUP_CHUNK)]
+    for data in await asyncio.gather(*(fetch_products(chunk, authorization, client) for chunk in chunks)):
+        for product_id, product in data["products"].items():
+            product_cache.set(int(product_id), product, stale_ttl=PRODUCT_CACHE_STALE_TTL)
+            products[int(product_id)] = product
+        for product_id in data["missing"]:
+            products[product_id] = HTTPException(status_code=404, detail="Producto no encontrado")
+    return products
+
+
 @router.get("/orders", response_model=list[OrderRead])
 async def list_orders(
+        request: Request,
+        response: Response,
+        page: PageParams = Depends(),
         user=Depends(cliente_required),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    orders = db.query(Order).all()
-    return orders
+    orders = (await db.scalars(paginate(select(Order), Order.id, page))).all()
+    return page_response(request, response, orders, page)
 
 @router.post("/orders", response_model=OrderRead, status_code=201)
 async def create_order(
         order_data: OrderCreate,
         authorization: str = Header(None),
         user=Depends(cliente_required),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        client: httpx.AsyncClient = Depends(get_http_client)
 ):
-    product = await get_product_info(order_data.producto_id, authorization)
+    product = await get_product_info(order_data.producto_id, authorization, client)
 
 
     total = product["precio"] * order_data.cantidad
 
     new_order = Order(
+        producto_id=order_data.producto_id,
         producto=product["nombre"],
         precio=product["precio"],
         cantidad=order_data.cantidad,
@@ -92,20 +176,130 @@ async def create_order(
     )
 
     db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    await db.flush()
+    await record_sales(db, [new_order])
+    await db.commit()
+    await db.refresh(new_order)
 
     return new_order
 
+@router.post("/orders/batch", response_model=OrderBatchResult, status_code=201)
+async def create_orders_batch(
+        batch: OrderBatchCreate,
+        response: Response,
+        authorization: str = Header(None),
+        user=Depends(cliente_required),
+        db: AsyncSession = Depends(get_db),
+        client: httpx.AsyncClient = Depends(get_http_client)
+):
+    # Una sola consulta en lote por los productos que no están en caché
+    product_ids = list(dict.fromkeys(item.producto_id for item in batch.items))
+    products = await get_products_info(product_ids, authorization, client)
+
+    results = []
+    new_orders = []
+    for item in batch.items:
+        product = products[item.producto_id]
+        if isinstance(product, HTTPException):
+            results.append(OrderLineResult(
+                producto_id=item.producto_id,
+                status_code=product.status_code,
+                error=product.detail
+            ))
+            continue
+        new_order = Order(
+            producto_id=item.producto_id,
+            producto=product["nombre"],
+            precio=product["precio"],
+            cantidad=item.cantidad,
+            total=product["precio"] * item.cantidad
+        )
+        new_orders.append(new_order)
+        results.append(OrderLineResult(producto_id=item.producto_id, status_code=201))
+
+    # Todas las líneas válidas se insertan en una sola transacción
+    db.add_all(new_orders)
+    await db.flush()
+    await record_sales(db, new_orders)
+    await db.commit()
+
+    created = iter(new_orders)
+    for result in results:
+        if result.status_code == 201:
+            result.order = OrderRead.model_validate(next(created), from_attributes=True)
+
+    failed = len(results) - len(new_orders)
+    if failed:
+        response.status_code = 207
+    return OrderBatchResult(created=len(new_orders), failed=failed, results=results)
+
+@router.get("/orders/export", dependencies=[Depends(admin_required)])
+async def export_orders(formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")):
+    stmt = select(
+        Order.id, Order.producto_id, Order.producto, Order.precio, Order.cantidad, Order.total, Order.created_at
+    ).order_by(Order.id)
+    return export_response(stmt, formato, "orders")
+
+# Reportes de ventas: leen las tablas de agregados, no la tabla orders
+@router.get("/orders/stats/products", response_model=list[ProductSalesRead], dependencies=[Depends(admin_required)])
+async def sales_by_product(
+        limit: int = Query(20, ge=1, le=500, description="Cantidad de productos"),
+        orden: str = Query("revenue", alias="order_by", pattern="^(revenue|units|orders_count)$"),
+        db: AsyncSession = Depends(get_db)
+):
+    column = getattr(ProductSales, orden)
+    stmt = select(ProductSales).order_by(column.desc(), ProductSales.producto_id).limit(limit)
+    return (await db.scalars(stmt)).all()
+
+@router.get("/orders/stats/daily", response_model=list[DailySalesRead], dependencies=[Depends(admin_required)])
+async def sales_by_day(
+        desde: date | None = Query(None, description="Primer día (incluido)"),
+        hasta: date | None = Query(None, description="Último día (incluido)"),
+        db: AsyncSession = Depends(get_db)
+):
+    stmt = select(DailySales).order_by(DailySales.day)
+    if desde is not None:
+        stmt = stmt.where(DailySales.day >= desde)
+    if hasta is not None:
+        stmt = stmt.where(DailySales.day <= hasta)
+    return (await db.scalars(stmt)).all()
+
+@router.get("/orders/stats/summary", response_model=SalesSummary, dependencies=[Depends(admin_required)])
+async def sales_summary(
+        desde: date | None = Query(None, description="Primer día (incluido)"),
+        hasta: date | None = Query(None, description="Último día (incluido)"),
+        db: AsyncSession = Depends(get_db)
+):
+    stmt = select(
+        func.coalesce(func.sum(DailySales.orders_count), 0),
+        func.coalesce(func.sum(DailySales.units), 0),
+        func.coalesce(func.sum(DailySales.revenue), 0.0),
+    )
+    if desde is not None:
+        stmt = stmt.where(DailySales.day >= desde)
+    if hasta is not None:
+        stmt = stmt.where(DailySales.day <= hasta)
+    orders_count, units, revenue = (await db.execute(stmt)).one()
+    return SalesSummary(orders_count=orders_count, units=units, revenue=revenue, desde=desde, hasta=hasta)
+
 @router.get("/orders/{order_id}", response_model=OrderRead)
 async def get_order(
         order_id: int,
         user=Depends(cliente_required),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id)
 
     if not order:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
 
-    return order
\ No newline at end of file
+    return order
+
+
+@router.post("/internal/product-events", status_code=204)
+async def product_event(event: ProductEvent, x_internal_token: str = Header(None)):
+    if not INTERNAL_EVENTS_TOKEN:
+        raise HTTPException(status_code=503, detail="Eventos internos no configurados")
+    if x_internal_token != INTERNAL_EVENTS_TOKEN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+    product_cache.delete(event.product_id)
@@ -0,0 +1,55 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import DailySales, Order, ProductSales
+
+
+def _upsert(dialect: str, model, rows: list[dict], key: str, latest: tuple = ()):
+    # INSERT ... ON CONFLICT que suma los contadores a la fila existente;
+    # las columnas de `latest` se sobrescriben con el valor nuevo
+    table = model.__table__
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(rows)
+        new = stmt.inserted
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        new = stmt.excluded
+    updates = {name: table.c[name] + new[name] for name in ("orders_count", "units", "revenue")}
+    updates.update({name: new[name] for name in latest})
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(**updates)
+    return stmt.on_conflict_do_update(index_elements=[table.c[key]], set_=updates)
+
+
+async def record_sales(db: AsyncSession, orders: list[Order]):
+    # Se llama después de flush (created_at ya tiene valor) y antes del
+    # commit del pedido, para que agregados y pedidos nunca diverjan
+    if not orders:
+        return
+    by_product = {}
+    by_day = {}
+    for order in orders:
+        product = by_product.setdefault(order.producto_id, {
+            "producto_id": order.producto_id, "producto": order.producto,
+            "orders_count": 0, "units": 0, "revenue": 0.0, "last_order_at": order.created_at,
+        })
+        day = by_day.setdefault(order.created_at.date(), {
+            "day": order.created_at.date(), "orders_count": 0, "units": 0, "revenue": 0.0,
+        })
+        for row in (product, day):
+            row["orders_count"] += 1
+            row["units"] += order.cantidad
+            row["revenue"] += order.total
+        product["producto"] = order.producto
+        product["last_order_at"] = max(product["last_order_at"], order.created_at)
+    dialect = db.bind.dialect.name
+    # Filas en orden de clave: dos transacciones concurrentes bloquean en el
+    # mismo orden y no pueden quedar en deadlock
+    await db.execute(_upsert(
+        dialect, ProductSales, [by_product[key] for key in sorted(by_product)], "producto_id",
+        latest=("producto", "last_order_at")
+    ))
+    await db.execute(_upsert(dialect, DailySales, [by_day[key] for key in sorted(by_day)], "day"))
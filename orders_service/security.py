@@ -0,0 +1,80 @@
+import hashlib
+import os
+import time
+from fastapi import HTTPException
+from cache import TTLCache
+
+# Debe coincidir con la configuración de auth_service/utils.py
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "1020112998")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Con algoritmos asimétricos (RS256, ES256...) se verifica con la llave pública
+PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+
+# "local": valida el JWT en este proceso; "remote": consulta /me en auth_service
+AUTH_MODE = os.getenv("AUTH_MODE", "local").lower()
+
+# Identidades resueltas por token; la vigencia nunca supera el "exp" del JWT
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "60"))
+identity_cache = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
+
+def _jose():
+    # python-jose se importa en el primer uso para no alargar el arranque
+    from jose import jwt, JWTError
+    return jwt, JWTError
+
+
+def _verification_key():
+    if ALGORITHM.startswith(("RS", "ES", "PS")):
+        if not PUBLIC_KEY:
+            raise RuntimeError("JWT_PUBLIC_KEY es obligatoria para algoritmos asimétricos")
+        return PUBLIC_KEY
+    return SECRET_KEY
+
+
+def extract_token(authorization: str):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Token no proporcionado")
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Formato de token inválido. Debe comenzar con 'Bearer '")
+    return authorization.split(" ")[1]
+
+
+def token_cache_key(token: str):
+    # Nunca se guarda el token en claro como llave
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_ttl(token: str):
+    jwt, JWTError = _jose()
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return 0
+    if exp is None:
+        return IDENTITY_CACHE_TTL
+    return min(IDENTITY_CACHE_TTL, exp - time.time())
+
+
+def decode_access_token(token: str):
+    jwt, JWTError = _jose()
+    try:
+        # jose valida la firma y el claim "exp"
+        return jwt.decode(token, _verification_key(), algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+def user_from_token(authorization: str):
+    payload = decode_access_token(extract_token(authorization))
+    if not payload:
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+    if not payload.get("sub") or not payload.get("role"):
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+    # Misma forma que la respuesta de /me (UserPublic)
+    return {
+        "id": payload.get("id"),
+        "email": payload["sub"],
+        "role": payload["role"],
+    }
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    # Cache en memoria con expiración por entrada, desalojo LRU y
+    # coalescencia de fallos: varias peticiones concurrentes por la misma
+    # llave disparan una sola carga. Con stale_ttl > 0 una entrada vencida
+    # se sigue sirviendo mientras se refresca en segundo plano
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        # Devuelve (valor, vigente) o None si la llave no existe o ya no
+        # puede servirse ni siquiera como dato viejo
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, stale_until, value = entry
+        now = time.monotonic()
+        if stale_until <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, expires_at > now
+
+    def get(self, key, default=None):
+        found = self._lookup(key)
+        if found is None or not found[1]:
+            return default
+        return found[0]
+
+    def set(self, key, value, ttl: float | None = None, stale_ttl: float = 0.0):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        now = time.monotonic()
+        self._data[key] = (now + ttl, now + ttl + stale_ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_load(self, key, loader, ttl: float | None = None, stale_ttl: float = 0.0):
+        found = self._lookup(key)
+        if found is not None:
+            value, fresh = found
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._start_load(key, loader, ttl, stale_ttl, background=True)
+            return value
+        self.misses += 1
+        task = self._start_load(key, loader, ttl, stale_ttl)
+        # shield: si una petición se cancela no se cancela la carga compartida
+        return await asyncio.shield(task)
+
+    def _start_load(self, key, loader, ttl, stale_ttl, background=False):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl, stale_ttl))
+            self._inflight[key] = task
+            if background:
+                # Nadie espera un refresco en segundo plano: si falla se
+                # conserva el dato viejo hasta que venza stale_ttl
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _load(self, key, loader, ttl, stale_ttl):
+        try:
+            value = await loader()
+            self.set(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.stale_hits) / total if total else 0.0,
+        }
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+import os
+import httpx
+from http_client import request_options
+
+# URLs que reciben los eventos de cambio de producto, separadas por coma
+# (p. ej. http://orders:8000/internal/product-events)
+PRODUCT_EVENT_WEBHOOKS = [
+    url.strip() for url in os.getenv("PRODUCT_EVENT_WEBHOOKS", "").split(",") if url.strip()
+]
+# Lo exige el receptor (orders_service) en X-Internal-Token
+INTERNAL_EVENTS_TOKEN = os.getenv("INTERNAL_EVENTS_TOKEN")
+
+logger = logging.getLogger("events")
+
+
+async def _deliver(client: httpx.AsyncClient, url: str, payload: dict):
+    try:
+        response = await client.post(
+            url, json=payload, headers={"X-Internal-Token": INTERNAL_EVENTS_TOKEN}, **request_options("events")
+        )
+    except httpx.RequestError as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    else:
+        if response.status_code < 300:
+            return
+        error = f"HTTP {response.status_code}"
+    # Si el evento se pierde, el TTL de la caché del consumidor acota
+    # el tiempo que puede servir datos viejos
+    logger.warning("No se pudo entregar el evento de producto", extra={"url": url, "error": error})
+
+
+async def publish_product_event(client: httpx.AsyncClient, product_id: int, event: str):
+    if PRODUCT_EVENT_WEBHOOKS and not INTERNAL_EVENTS_TOKEN:
+        logger.warning("Eventos de producto sin enviar: falta INTERNAL_EVENTS_TOKEN")
+        return
+    payload = {"product_id": product_id, "event": event}
+    await asyncio.gather(*(_deliver(client, url, payload) for url in PRODUCT_EVENT_WEBHOOKS))
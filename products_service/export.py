@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import os
+from fastapi.responses import StreamingResponse
+from database import Session
+
+# Filas por lote leídas del cursor del servidor; la memoria usada no depende
+# del tamaño de la tabla
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _partitions(stmt):
+    # Sesión propia: el generador sigue vivo después de que termina la ruta
+    async with Session() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.mappings().partitions():
+            yield partition
+
+
+def _json_default(value):
+    # Fechas en ISO 8601, como en las respuestas de la API
+    return value.isoformat()
+
+
+async def _ndjson(stmt):
+    async for rows in _partitions(stmt):
+        yield "".join(json.dumps(dict(row), ensure_ascii=False, default=_json_default) + "\n" for row in rows)
+
+
+async def _csv(stmt, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    async for rows in _partitions(stmt):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(stmt, formato: str, filename: str):
+    columns = [column.name for column in stmt.selected_columns]
+    body = _csv(stmt, columns) if formato == "csv" else _ndjson(stmt)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{formato}"'}
+    )
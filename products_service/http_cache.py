@@ -0,0 +1,68 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import CatalogState
+
+# Por defecto el cliente (o la caché de borde) debe revalidar con ETag
+CACHE_CONTROL = os.getenv("PRODUCTS_CACHE_CONTROL", "private, max-age=0, must-revalidate")
+
+
+async def get_catalog_state(db: AsyncSession):
+    return await db.get(CatalogState, 1)
+
+
+async def bump_catalog_version(db: AsyncSession):
+    # Incremento atómico en SQL para no perder versiones con escrituras concurrentes
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(CatalogState)
+        .where(CatalogState.id == 1)
+        .values(version=CatalogState.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        db.add(CatalogState(id=1, version=1, updated_at=now))
+
+
+def product_etag(product):
+    # id y versión no bastan: SQLite reutiliza el id más alto tras un borrado y
+    # la versión vuelve a 1, así que el ETag incluye un hash del contenido
+    updated_at = product.updated_at.isoformat() if product.updated_at else ""
+    content = f"{product.nombre}|{product.precio!r}|{product.descripcion}|{updated_at}"
+    digest = hashlib.sha1(content.encode()).hexdigest()[:16]
+    return f'"p{product.id}-v{product.version}-{digest}"'
+
+
+def list_etag(state, request: Request):
+    version = state.version if state else 0
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}?{query}".encode()).hexdigest()[:16]
+    return f'"c{version}-{digest}"'
+
+
+def cache_headers(etag: str, last_modified: datetime | None):
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(headers: dict):
+    return Response(status_code=304, headers=headers)
@@ -1,13 +1,28 @@
-from sqlalchemy import Column, Integer, String, Float
+import os
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, Float
 from pydantic import BaseModel, Field, validator
 from database import Base
 
+MAX_LOOKUP_IDS = int(os.getenv("MAX_LOOKUP_IDS", "200"))
+
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String, nullable=False)
-    precio = Column(Float, nullable=False)
+    nombre = Column(String, nullable=False, index=True)
+    precio = Column(Float, nullable=False, index=True)
     descripcion = Column(String(255), nullable=True)
+    # Se incrementa en cada escritura; alimenta el ETag del producto
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CatalogState(Base):
+    # Fila única con la versión del catálogo completo (ETag de los listados)
+    __tablename__ = "catalog_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
 class ProductCreate(BaseModel):
     nombre: str = Field(..., min_length=3, max_length=100, description="Nombre del producto (entre 3 y 100 caracteres)")
@@ -47,3 +62,12 @@ class ProductRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ProductLookup(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_LOOKUP_IDS)
+
+
+class ProductLookupResult(BaseModel):
+    products: dict[int, ProductRead]
+    missing: list[int]
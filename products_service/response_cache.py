@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from http_cache import is_not_modified, not_modified
+
+# "memory": LRU en el proceso; "redis": compartida entre workers; "none": desactivada
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+# Con el backend en memoria cada worker invalida solo su copia: el TTL acota
+# cuánto puede servir otro worker una respuesta vieja
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class InMemoryBackend:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        # Los contadores no entran en el LRU: perder uno reviviría entradas viejas
+        self._counters = {}
+
+    async def get(self, key):
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def incr(self, key):
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+
+class RedisBackend:
+    # Acepta cualquier cliente con la interfaz de redis.asyncio
+    # (get/set con ex/incr), p. ej. un fake en pruebas locales
+    def __init__(self, client, prefix: str = "products:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key):
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key, value, ttl: float | None = None):
+        await self.client.set(self.prefix + key, value, ex=max(1, int(ttl)) if ttl else None)
+
+    async def incr(self, key):
+        return await self.client.incr(self.prefix + key)
+
+
+class ResponseCache:
+    # Guarda respuestas JSON ya serializadas (cabeceras + cuerpo). Las
+    # llaves llevan un número de generación: invalidar es incrementarlo. get()
+    # devuelve la llave leída antes de consultar la BD y set() guarda con esa
+    # misma llave, así una lectura que se cruza con una escritura guarda su
+    # dato viejo en una generación que ya nadie consulta
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def _key(self, kind: str, ident):
+        generation = int(await self.backend.get(f"gen:{kind}") or 0)
+        return f"{kind}:{generation}:{ident}"
+
+    async def get(self, kind: str, ident):
+        # (llave, (cabeceras, cuerpo)) en un acierto, (llave, None) en un fallo
+        if self.backend is None:
+            return None, None
+        key = await self._key(kind, ident)
+        raw = await self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        header_line, _, body = raw.partition(b"\n")
+        return key, (json.loads(header_line), body)
+
+    async def set(self, key, headers: dict, body: bytes):
+        if self.backend is None or key is None:
+            return
+        raw = json.dumps(headers).encode() + b"\n" + body
+        await self.backend.set(key, raw, self.ttl)
+
+    async def invalidate(self, kind: str):
+        if self.backend is not None:
+            await self.backend.incr(f"gen:{kind}")
+
+    async def invalidate_product(self, product_id: int):
+        await self.invalidate(f"product-{product_id}")
+        await self.invalidate("list")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": RESPONSE_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def list_cache_ident(request: Request):
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def cached_response(request: Request, headers: dict, body: bytes):
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _create_backend():
+    if RESPONSE_CACHE_BACKEND == "none":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requiere el paquete 'redis'")
+        return RedisBackend(redis.from_url(REDIS_URL))
+    return InMemoryBackend(RESPONSE_CACHE_SIZE)
+
+
+response_cache = ResponseCache(_create_backend(), RESPONSE_CACHE_TTL)
@@ -1,31 +1,53 @@
 # routes.py
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from models import Product, ProductCreate, ProductUpdate, ProductRead
+from models import MAX_LOOKUP_IDS, Product, ProductCreate, ProductLookup, ProductLookupResult, ProductUpdate, ProductRead
+from security import AUTH_MODE, extract_token, identity_cache, token_cache_key, token_ttl, user_from_token
+from discovery import service_url
+from http_client import get_http_client, request_options
+from pagination import PageParams, page_response, paginate
+from export import export_response
+from events import publish_product_event
+from http_cache import bump_catalog_version, cache_headers, get_catalog_state, list_etag, product_etag
+from response_cache import cached_response, list_cache_ident, response_cache
 import httpx
 
 router = APIRouter()
 
+product_adapter = TypeAdapter(ProductRead)
+product_list_adapter = TypeAdapter(list[ProductRead])
 
-AUTH_URL = "https://fastapi-render-f2yz.onrender.com/me"
-
-async def get_current_user(authorization: str = Header(None)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Token no proporcionado")
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                AUTH_URL,
-                headers={"Authorization": authorization},
-                timeout=5.0
-            )
-        except httpx.RequestError:
-            raise HTTPException(status_code=503, detail="No se pudo conectar con el servicio de autenticación")
+
+async def load_user(authorization: str, client: httpx.AsyncClient):
+    if AUTH_MODE == "local":
+        return user_from_token(authorization)
+    try:
+        response = await client.get(
+            service_url("auth", "/me"),
+            headers={"Authorization": authorization},
+            **request_options("auth")
+        )
+    except httpx.RequestError:
+        raise HTTPException(status_code=503, detail="No se pudo conectar con el servicio de autenticación")
     if response.status_code != 200:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
     return response.json()
 
+
+async def get_current_user(
+        authorization: str = Header(None),
+        client: httpx.AsyncClient = Depends(get_http_client)
+):
+    token = extract_token(authorization)
+    return await identity_cache.get_or_load(
+        token_cache_key(token),
+        lambda: load_user(authorization, client),
+        ttl=token_ttl(token)
+    )
+
 async def admin_required(user=Depends(get_current_user)):
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Solo los administradores pueden realizar esta acción")
@@ -37,14 +59,41 @@ async def cliente_o_admin(user=Depends(get_current_user)):
     return user
 
 @router.get("/products", response_model=list[ProductRead], dependencies=[Depends(cliente_o_admin)])
-def list_products(db: Session = Depends(get_db)):
-    products = db.query(Product).all()
-    return products
+async def list_products(
+        request: Request,
+        response: Response,
+        page: PageParams = Depends(),
+        min_precio: float | None = Query(None, ge=0, description="Precio mínimo"),
+        max_precio: float | None = Query(None, ge=0, description="Precio máximo"),
+        nombre: str | None = Query(None, min_length=1, max_length=100, description="Prefijo del nombre"),
+        db: AsyncSession = Depends(get_db)
+):
+    ident = list_cache_ident(request)
+    cache_key, cached = await response_cache.get("list", ident)
+    if cached:
+        return cached_response(request, *cached)
+
+    state = await get_catalog_state(db)
+    stmt = select(Product)
+    if min_precio is not None:
+        stmt = stmt.where(Product.precio >= min_precio)
+    if max_precio is not None:
+        stmt = stmt.where(Product.precio <= max_precio)
+    if nombre:
+        stmt = stmt.where(Product.nombre.startswith(nombre.strip().title(), autoescape=True))
+    products = (await db.scalars(paginate(stmt, Product.id, page))).all()
+    products = page_response(request, response, products, page)
+
+    headers = cache_headers(list_etag(state, request), state.updated_at if state else None)
+    headers.update({k: response.headers[k] for k in ("Link", "X-Next-Cursor") if k in response.headers})
+    body = product_list_adapter.dump_json(product_list_adapter.validate_python(products, from_attributes=True))
+    await response_cache.set(cache_key, headers, body)
+    return cached_response(request, headers, body)
 
 
 @router.post("/products", response_model=ProductRead, dependencies=[Depends(admin_required)])
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
-    product_exist = db.query(Product).filter(Product.nombre == product.nombre).first()
+async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_db)):
+    product_exist = await db.scalar(select(Product).where(Product.nombre == product.nombre))
     if product_exist:
         raise HTTPException(
             status_code=400,
@@ -56,8 +105,10 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         descripcion=product.descripcion
     )
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(db_product)
+    await response_cache.invalidate("list")
 
     return db_product
 
@@ -67,13 +118,15 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     response_model=ProductRead,
     dependencies=[Depends(admin_required)]
 )
-def update_product(
+async def update_product(
         product_id: int,
         product_update: ProductUpdate,
-        db: Session = Depends(get_db)
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_db),
+        client: httpx.AsyncClient = Depends(get_http_client)
 ):
     # Buscar el producto a actualizar
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
@@ -85,10 +138,10 @@ def update_product(
         nombre_nuevo = update_data["nombre"].strip()
         if nombre_nuevo != "":
             # Verificar si otro producto ya tiene ese nombre
-            existente = db.query(Product).filter(
+            existente = await db.scalar(select(Product).where(
                 Product.nombre == nombre_nuevo,
                 Product.id != product_id
-            ).first()
+            ))
             if existente:
                 raise HTTPException(
                     status_code=400,
@@ -101,25 +154,76 @@ def update_product(
             if isinstance(value, str) and value.strip() == "":
                 continue
             setattr(product, key, value)
+    product.version += 1
 
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(product)
+    await response_cache.invalidate_product(product_id)
+    background_tasks.add_task(publish_product_event, client, product_id, "updated")
     return product
 
 
 @router.delete("/products/{product_id}", dependencies=[Depends(admin_required)])
-def delete_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+async def delete_product(
+        product_id: int,
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_db),
+        client: httpx.AsyncClient = Depends(get_http_client)
+):
+    db_product = await db.get(Product, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    db.delete(db_product)
-    db.commit()
+    await db.delete(db_product)
+    await bump_catalog_version(db)
+    await db.commit()
+    await response_cache.invalidate_product(product_id)
+    background_tasks.add_task(publish_product_event, client, product_id, "deleted")
     return {"Message": "Producto eliminado"}
 
+async def lookup_products(ids: list[int], db: AsyncSession):
+    ids = list(dict.fromkeys(ids))
+    products = (await db.scalars(select(Product).where(Product.id.in_(ids)))).all()
+    found = {product.id: product for product in products}
+    return {"products": found, "missing": [i for i in ids if i not in found]}
+
+@router.get("/products/lookup", response_model=ProductLookupResult, dependencies=[Depends(cliente_o_admin)])
+async def lookup_products_get(
+        ids: str = Query(..., description="IDs separados por coma, p. ej. 1,2,3"),
+        db: AsyncSession = Depends(get_db)
+):
+    try:
+        id_list = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Los ids deben ser enteros separados por coma")
+    if not id_list or len(id_list) > MAX_LOOKUP_IDS:
+        raise HTTPException(status_code=400, detail=f"Se deben enviar entre 1 y {MAX_LOOKUP_IDS} ids")
+    return await lookup_products(id_list, db)
+
+@router.post("/products/lookup", response_model=ProductLookupResult, dependencies=[Depends(cliente_o_admin)])
+async def lookup_products_post(lookup: ProductLookup, db: AsyncSession = Depends(get_db)):
+    return await lookup_products(lookup.ids, db)
+
+@router.get("/products/export", dependencies=[Depends(admin_required)])
+async def export_products(formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")):
+    stmt = select(Product.id, Product.nombre, Product.precio, Product.descripcion).order_by(Product.id)
+    return export_response(stmt, formato, "products")
+
 @router.get("/products/{product_id}", response_model=ProductRead, dependencies=[Depends(cliente_o_admin)])
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def get_product(
+        product_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_db)
+):
+    cache_key, cached = await response_cache.get(f"product-{product_id}", product_id)
+    if cached:
+        return cached_response(request, *cached)
+
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return product
\ No newline at end of file
+    headers = cache_headers(product_etag(product), product.updated_at)
+    body = product_adapter.dump_json(product_adapter.validate_python(product, from_attributes=True))
+    await response_cache.set(cache_key, headers, body)
+    return cached_response(request, headers, body)
\ No newline at end of file
@@ -0,0 +1,221 @@
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import httpx
+from sqlalchemy import event
+
+# Trazas compatibles con OpenTelemetry (W3C traceparent, ids de 128/64 bits)
+# sin depender del SDK. TRACE_EXPORTER: "none", "file" (JSON por línea en
+# TRACE_FILE) o "http" (lotes JSON a TRACE_COLLECTOR_URL)
+SERVICE_NAME = os.getenv("SERVICE_NAME", "products_service")
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", f"./traces-{SERVICE_NAME}.jsonl")
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "256"))
+
+TRACING_ENABLED = TRACE_EXPORTER != "none"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str | None, sampled: bool):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = {}
+        self.status = "UNSET"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: bool = False):
+        self.end_ns = time.time_ns()
+        if error:
+            self.status = "ERROR"
+        if self.sampled:
+            _exporter.export(self)
+
+    def to_dict(self):
+        return {
+            "service.name": SERVICE_NAME,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+def parse_traceparent(header: str | None):
+    # Devuelve (trace_id, span_id, sampled) o None si la cabecera es inválida
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+def new_span(name: str, kind: str = "INTERNAL", traceparent: str | None = None):
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    elif remote is not None:
+        trace_id, parent_id, sampled = remote
+    else:
+        trace_id, parent_id = "%032x" % random.getrandbits(128), None
+        sampled = random.random() < TRACE_SAMPLE_RATIO
+    return Span(name, kind, trace_id, parent_id, sampled)
+
+
+def start_span(name: str, kind: str = "INTERNAL", traceparent: str | None = None):
+    span = new_span(name, kind, traceparent)
+    return span, _current_span.set(span)
+
+
+def end_span(span: Span, token, error: bool = False):
+    _current_span.reset(token)
+    span.end(error)
+
+
+class _Exporter:
+    # Las escrituras ocurren en un hilo aparte para no bloquear el event loop
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def export(self, span: Span):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="trace-exporter", daemon=True)
+            self._thread.start()
+        self._queue.put(span.to_dict())
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < TRACE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                # Perder trazas nunca debe afectar al servicio
+                pass
+
+    def _write(self, batch):
+        if TRACE_EXPORTER == "file":
+            with open(TRACE_FILE, "a", encoding="utf-8") as fh:
+                fh.write("".join(json.dumps(span) + "\n" for span in batch))
+        elif TRACE_EXPORTER == "http":
+            import urllib.request
+            request = urllib.request.Request(
+                TRACE_COLLECTOR_URL,
+                data=json.dumps({"spans": batch}).encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+
+
+_exporter = _Exporter()
+
+
+class TracingMiddleware:
+    # Span de servidor por petición; continúa la traza del traceparent entrante
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode() or None
+        span, token = start_span(scope["method"], "SERVER", traceparent)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else scope["path"]
+            span.name = f"{scope['method']} {path}"
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.route", path)
+            span.set_attribute("http.status_code", status["code"])
+            end_span(span, token, error=status["code"] >= 500)
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    # Span de cliente por llamada saliente y propagación de traceparent
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        target = request.extensions.get("service", request.url.host)
+        span, token = start_span(f"{request.method} {target}", "CLIENT")
+        span.set_attribute("http.method", request.method)
+        span.set_attribute("http.url", str(request.url.copy_with(query=None)))
+        span.set_attribute("peer.service", target)
+        request.headers["traceparent"] = span.traceparent
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            end_span(span, token, error=True)
+            raise
+        span.set_attribute("http.status_code", response.status_code)
+        end_span(span, token, error=response.status_code >= 500)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def instrument_engine(engine):
+    # Un span por sentencia SQL ejecutada por el motor
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # Spans hoja: no se activan en el contexto, sólo se cuelgan del actual
+        span = new_span("db.query", "CLIENT")
+        span.set_attribute("db.system", engine.dialect.name)
+        span.set_attribute("db.statement", statement[:500])
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        spans = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+        if spans:
+            spans.pop().end(error=True)
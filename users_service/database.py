@@ -1,17 +1,79 @@
-from sqlalchemy import create_engine
+import os
+import time
+from sqlalchemy import create_engine, event
+from metrics import DB_SESSION_TIME
+from tracing import TRACING_ENABLED, instrument_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-url_database = "sqlite:///./users.db"
+url_database = os.getenv("DATABASE_URL", "sqlite:///./users.db")
 
-engine = create_engine(url_database, connect_args={"check_same_thread": False})
+# Pool de conexiones (ignorado por SQLite en memoria)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
 
-Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)  
+# Ajustes de SQLite aplicados a cada conexión nueva
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def to_async_url(url: str):
+    # Driver asíncrono: aiosqlite en local, asyncpg/aiomysql en producción
+    for prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("mysql://", "mysql+aiomysql://"),
+        ("mysql+pymysql://", "mysql+aiomysql://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(url_database))
+
+
+def engine_options(url: str):
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False} if "aiosqlite" not in url else {}
+        if ":memory:" in url or url.endswith("://"):
+            return options
+    options["pool_size"] = DB_POOL_SIZE
+    options["max_overflow"] = DB_MAX_OVERFLOW
+    return options
+
+
+def configure_sqlite(dbapi_connection, connection_record):
+    # WAL permite lecturas concurrentes con una escritura en curso
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+# El motor síncrono solo lo usan las migraciones
+engine = create_engine(url_database, **engine_options(url_database))
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", configure_sqlite)
+    event.listen(async_engine.sync_engine, "connect", configure_sqlite)
+if TRACING_ENABLED:
+    instrument_engine(async_engine.sync_engine)
+
+Session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
-    db = Session()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+async def get_db():
+    start = time.perf_counter()
+    async with Session() as db:
+        try:
+            yield db
+        finally:
+            DB_SESSION_TIME.observe(time.perf_counter() - start)
@@ -0,0 +1,163 @@
+import logging
+import time
+import httpx
+from fastapi import Response
+
+# Registro mínimo de métricas en formato de texto de Prometheus, sin
+# dependencias externas. Todo corre en el event loop, no hacen falta locks
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+_collectors = []
+
+
+def _labels_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        _metrics.append(self)
+
+    def inc(self, *label_values, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        for values, value in self._values.items():
+            yield self.name + _labels_text(self.labels, values), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._values = {}
+        _metrics.append(self)
+
+    def observe(self, value: float, *label_values):
+        entry = self._values.get(label_values)
+        if entry is None:
+            entry = self._values[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += 1
+        entry[2] += value
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for values, (counts, count, total) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield self.name + "_bucket" + _labels_text(names, values + (bound,)), bucket_count
+            yield self.name + "_bucket" + _labels_text(names, values + ("+Inf",)), count
+            yield self.name + "_count" + _labels_text(self.labels, values), count
+            yield self.name + "_sum" + _labels_text(self.labels, values), total
+
+
+def register_stats(prefix: str, stats):
+    # stats() devuelve un dict leído en el momento del scrape (p. ej. las
+    # estadísticas de una caché); cada valor numérico se publica como gauge
+    _collectors.append((prefix, stats))
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name} {value}" for name, value in metric.samples())
+    for prefix, stats in _collectors:
+        for key, value in stats().items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response():
+    return Response(content=render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "Peticiones atendidas", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latencia por ruta", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones en curso")
+OUTBOUND_LATENCY = Histogram("http_client_request_duration_seconds", "Latencia de llamadas a otros servicios", ("target", "method", "status"))
+OUTBOUND_ERRORS = Counter("http_client_errors_total", "Errores de conexión en llamadas a otros servicios", ("target",))
+DB_SESSION_TIME = Histogram("db_session_duration_seconds", "Tiempo de vida de cada sesión de base de datos")
+
+
+access_logger = logging.getLogger("access")
+
+
+class MetricsMiddleware:
+    # Middleware ASGI puro: no envuelve la respuesta como BaseHTTPMiddleware
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Se usa la plantilla de la ruta (/products/{product_id}) para no
+            # crear una serie por cada id
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            elapsed = time.perf_counter() - start
+            HTTP_LATENCY.observe(elapsed, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, status["code"])
+            if access_logger.isEnabledFor(logging.INFO):
+                access_logger.info("request", extra={
+                    "method": scope["method"],
+                    "route": path,
+                    "status": status["code"],
+                    "duration_ms": round(elapsed * 1000, 2),
+                })
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    # Envuelve el transporte del cliente compartido para medir cada llamada
+    # saliente; el destino viene de request_options() en http_client
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        target = request.extensions.get("service", request.url.host)
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            OUTBOUND_ERRORS.inc(target)
+            raise
+        OUTBOUND_LATENCY.observe(time.perf_counter() - start, target, request.method, response.status_code)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -1,15 +1,18 @@
 
 from sqlalchemy import Column, Integer, String
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from database import Base
+import os
 import re
 
+MAX_SYNC_BATCH_SIZE = int(os.getenv("MAX_SYNC_BATCH_SIZE", "10000"))
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
-    role = Column(String, default="cliente", nullable=False)
+    role = Column(String, default="cliente", nullable=False, index=True)
 
 
 class UserRead(BaseModel):
@@ -39,3 +42,19 @@ class UserUpdate(BaseModel):
         return v
     class Config:
         orm_mode = True
+
+
+class UserSync(BaseModel):
+    id: int = Field(..., gt=0)
+    email: str = Field(..., min_length=3, max_length=255)
+    role: str = "cliente"
+
+
+class UserSyncBatch(BaseModel):
+    users: list[UserSync] = Field(..., min_length=1, max_length=MAX_SYNC_BATCH_SIZE)
+
+
+class UserSyncResult(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
@@ -0,0 +1,35 @@
+import os
+from fastapi import Query, Request, Response
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+
+class PageParams:
+    # Paginación por cursor (keyset) sobre la columna id: cada página
+    # continúa después del último id entregado, sin OFFSET
+    def __init__(
+            self,
+            limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de la página"),
+            after: int | None = Query(None, ge=0, description="Cursor: id del último elemento de la página anterior")
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def paginate(stmt, column, page: PageParams):
+    if page.after is not None:
+        stmt = stmt.where(column > page.after)
+    # Se pide un elemento de más para saber si existe una página siguiente
+    return stmt.order_by(column).limit(page.limit + 1)
+
+
+def page_response(request: Request, response: Response, items, page: PageParams):
+    items = list(items)
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        next_cursor = items[-1].id
+        next_url = request.url.include_query_params(after=next_cursor, limit=page.limit)
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return items
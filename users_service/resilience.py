@@ -0,0 +1,222 @@
+import asyncio
+import os
+import random
+import time
+import httpx
+from discovery import DEFAULT_URLS, origin, registry
+from metrics import Counter
+
+# Capa de resiliencia para las llamadas salientes, por servicio destino
+# (el nombre que pone request_options en la extensión "service")
+
+# Circuit breaker: tras BREAKER_FAILURE_THRESHOLD fallos seguidos el destino
+# queda abierto BREAKER_OPEN_SECONDS y las llamadas fallan al instante;
+# después se deja pasar una única llamada de prueba (half-open)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+
+# Reintentos sólo para peticiones idempotentes, con backoff exponencial con
+# jitter. El presupuesto limita los reintentos a RETRY_BUDGET_RATIO por
+# petición (más un mínimo de RETRY_BUDGET_MIN) para no multiplicar la carga
+# sobre un destino que ya está caído
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.05"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "1"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MIN = float(os.getenv("RETRY_BUDGET_MIN", "10"))
+
+# Hedging: si un GET a uno de HEDGE_TARGETS no responde en HEDGE_DELAY
+# segundos se lanza una segunda petición (a otra instancia si hay varias)
+# y gana la primera respuesta. Desactivado por defecto
+HEDGE_TARGETS = {name.strip() for name in os.getenv("HEDGE_TARGETS", "").split(",") if name.strip()}
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "0.1"))
+
+RETRYABLE_STATUS = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+CIRCUIT_REJECTED = Counter("http_client_circuit_rejected_total", "Llamadas rechazadas por circuito abierto", ("target",))
+RETRIES = Counter("http_client_retries_total", "Reintentos de llamadas salientes", ("target",))
+HEDGES = Counter("http_client_hedged_total", "Peticiones duplicadas por hedging", ("target",))
+
+
+class CircuitOpenError(httpx.TransportError):
+    # Hereda de TransportError para que los llamadores lo traten igual que
+    # un destino caído (503)
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= BREAKER_OPEN_SECONDS:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        # Una sola llamada de prueba a la vez; si se pierde (p. ej. la
+        # petición se cancela) se permite otra pasado el mismo intervalo
+        now = time.monotonic()
+        if state == "half_open" and (self.probe_started is None or now - self.probe_started >= BREAKER_OPEN_SECONDS):
+            self.probe_started = now
+            return True
+        return False
+
+    def record(self, ok: bool):
+        self.probe_started = None
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    def __init__(self):
+        self.balance = RETRY_BUDGET_MIN
+
+    def deposit(self):
+        self.balance = min(self.balance + RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN)
+
+    def withdraw(self):
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+_breakers = {}
+_budgets = {}
+
+
+def breaker_for(target: str):
+    breaker = _breakers.get(target)
+    if breaker is None:
+        breaker = _breakers[target] = CircuitBreaker()
+    return breaker
+
+
+def budget_for(target: str):
+    budget = _budgets.get(target)
+    if budget is None:
+        budget = _budgets[target] = RetryBudget()
+    return budget
+
+
+def backoff(attempt: int):
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def circuit_stats():
+    return {
+        "open_circuits": sum(1 for breaker in _breakers.values() if breaker.state != "closed"),
+    }
+
+
+def _alternate(request: httpx.Request, target: str):
+    # Para reintentos y hedging se prefiere otra instancia del mismo servicio
+    current = origin(request.url)
+    instances = registry.instances(target) if target in DEFAULT_URLS else []
+    if current not in instances or len(instances) < 2:
+        return request
+    instance = registry.pick(target)
+    if instance == current:
+        instance = registry.pick(target)
+    return httpx.Request(
+        request.method,
+        instance + request.url.raw_path.decode("ascii"),
+        headers=request.headers,
+        content=request.content,
+        extensions=request.extensions,
+    )
+
+
+_closing = set()
+
+
+def _discard_response(task):
+    if not task.cancelled() and task.exception() is None:
+        closing = asyncio.ensure_future(task.result().aclose())
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
+
+
+class ResilienceTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        target = request.extensions.get("service")
+        if target is None:
+            return await self._transport.handle_async_request(request)
+        breaker = breaker_for(target)
+        budget = budget_for(target)
+        budget.deposit()
+        idempotent = request.method in IDEMPOTENT_METHODS or request.extensions.get("idempotent", False)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                CIRCUIT_REJECTED.inc(target)
+                raise CircuitOpenError(f"Circuito abierto para {target}", request=request)
+            try:
+                if request.method == "GET" and target in HEDGE_TARGETS:
+                    response = await self._hedged(request, target, budget)
+                else:
+                    response = await self._transport.handle_async_request(request)
+            except httpx.TransportError:
+                breaker.record(False)
+                if not idempotent or attempt >= RETRY_ATTEMPTS or not budget.withdraw():
+                    raise
+            else:
+                failed = response.status_code >= 500
+                breaker.record(not failed)
+                if (response.status_code not in RETRYABLE_STATUS or not idempotent
+                        or attempt >= RETRY_ATTEMPTS or not budget.withdraw()):
+                    return response
+                await response.aclose()
+            attempt += 1
+            RETRIES.inc(target)
+            await asyncio.sleep(backoff(attempt))
+            request = _alternate(request, target)
+
+    async def _hedged(self, request, target, budget):
+        tasks = [asyncio.ensure_future(self._transport.handle_async_request(request))]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=HEDGE_DELAY)
+            if not done and budget.withdraw():
+                HEDGES.inc(target)
+                tasks.append(asyncio.ensure_future(
+                    self._transport.handle_async_request(_alternate(request, target))
+                ))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # También si cancelan al llamador: lo que sigue en curso se cancela
+            # y toda respuesta que no se devuelve libera su conexión
+            for task in tasks:
+                if task is not winner:
+                    task.cancel()
+                    task.add_done_callback(_discard_response)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -1,52 +1,80 @@
 # routes.py
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 from database import get_db
-from models import User, UserRead, UserUpdate
+from models import User, UserRead, UserSyncBatch, UserSyncResult, UserUpdate
+from security import AUTH_MODE, extract_token, identity_cache, token_cache_key, token_ttl, user_from_token
+from discovery import service_url
+from http_client import get_http_client, request_options
+from pagination import PageParams, page_response, paginate
+from sync import INTERNAL_SYNC_TOKEN, sync_users
 
 router = APIRouter()
 
-AUTH_URL = "https://fastapi-render-f2yz.onrender.com/me"
 
-async def admin_required(authorization: str = Header(None)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Token no proporcionado")
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                AUTH_URL,
-                headers={"Authorization": authorization},
-                timeout=30.0
-            )
-        except httpx.RequestError:
-            raise HTTPException(status_code=503, detail="No se pudo conectar con el servicio de autenticación")
+async def load_user(authorization: str, client: httpx.AsyncClient):
+    if AUTH_MODE == "local":
+        return user_from_token(authorization)
+    try:
+        response = await client.get(
+            service_url("auth", "/me"),
+            headers={"Authorization": authorization},
+            **request_options("auth")
+        )
+    except httpx.RequestError:
+        raise HTTPException(status_code=503, detail="No se pudo conectar con el servicio de autenticación")
     if response.status_code != 200:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
-    user = response.json()
+    return response.json()
+
+
+async def get_current_user(
+        authorization: str = Header(None),
+        client: httpx.AsyncClient = Depends(get_http_client)
+):
+    token = extract_token(authorization)
+    return await identity_cache.get_or_load(
+        token_cache_key(token),
+        lambda: load_user(authorization, client),
+        ttl=token_ttl(token)
+    )
+
+async def admin_required(user=Depends(get_current_user)):
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Acceso denegado")
     return user
 
 @router.get("/users", response_model=list[UserRead], dependencies=[Depends(admin_required)])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+async def get_users(
+        request: Request,
+        response: Response,
+        page: PageParams = Depends(),
+        role: str | None = Query(None, description="Filtrar por rol (admin o cliente)"),
+        db: AsyncSession = Depends(get_db)
+):
+    stmt = select(User)
+    if role:
+        stmt = stmt.where(User.role == role)
+    users = (await db.scalars(paginate(stmt, User.id, page))).all()
+    return page_response(request, response, users, page)
 
 @router.get("/users/{user_id}", response_model=UserRead, dependencies=[Depends(admin_required)])
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
 
 
 @router.put("/users/{user_id}", response_model=UserRead, dependencies=[Depends(admin_required)])
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     if user_update.email:
-        existing_user = db.query(User).filter(User.email == user_update.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_update.email))
         if existing_user and existing_user.id != user_id:
             raise HTTPException(status_code=400, detail="El email ya está en uso por otro usuario")
         user.email = user_update.email
@@ -55,22 +83,22 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     if user_update.role:
         user.role = user_update.role
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 @router.delete("/users/{user_id}", dependencies=[Depends(admin_required)])
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     return {"message": "Usuario eliminado correctamente"}
 
 @router.post("/sync_user")
-def sync_user(user_data: dict, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data["email"]).first()
+async def sync_user(user_data: dict, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user_data["email"]))
     if existing_user:
         return {"message": "Usuario ya sincronizado"}
 
@@ -80,6 +108,18 @@ def sync_user(user_data: dict, db: Session = Depends(get_db)):
         role=user_data["role"]
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return {"message": f"Usuario {new_user.email} sincronizado correctamente"}
+
+@router.post("/sync_users", response_model=UserSyncResult)
+async def sync_users_batch(
+        batch: UserSyncBatch,
+        x_internal_token: str = Header(None),
+        db: AsyncSession = Depends(get_db)
+):
+    if not INTERNAL_SYNC_TOKEN:
+        raise HTTPException(status_code=503, detail="Sincronización interna no configurada")
+    if x_internal_token != INTERNAL_SYNC_TOKEN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+    return await sync_users(db, [user.dict() for user in batch.users])
@@ -0,0 +1,67 @@
+import os
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User
+
+# Registros por sentencia INSERT ... ON CONFLICT
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "500"))
+# /sync_users puede cambiar email y rol de usuarios existentes: solo lo usa
+# auth_service, que debe enviar este valor en X-Internal-Token
+INTERNAL_SYNC_TOKEN = os.getenv("INTERNAL_SYNC_TOKEN")
+
+
+def _upsert(dialect: str, rows: list[dict]):
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(User).values(rows)
+        return stmt.on_duplicate_key_update(email=stmt.inserted.email, role=stmt.inserted.role)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(User).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={"email": stmt.excluded.email, "role": stmt.excluded.role}
+    )
+
+
+async def _sync_chunk(db: AsyncSession, records: list[dict], counts: dict):
+    ids = [record["id"] for record in records]
+    emails = [record["email"] for record in records]
+    existing = (await db.execute(
+        select(User.id, User.email, User.role).where(or_(User.id.in_(ids), User.email.in_(emails)))
+    )).all()
+    by_id = {row.id: (row.email, row.role) for row in existing}
+    email_owner = {row.email: row.id for row in existing}
+
+    rows = []
+    for record in records:
+        owner = email_owner.get(record["email"])
+        if owner is not None and owner != record["id"]:
+            # El email ya pertenece a otro id: no se puede aplicar sin conflicto
+            counts["skipped"] += 1
+            continue
+        current = by_id.get(record["id"])
+        if current == (record["email"], record["role"]):
+            counts["skipped"] += 1
+            continue
+        counts["updated" if current else "inserted"] += 1
+        if current:
+            email_owner.pop(current[0], None)
+        by_id[record["id"]] = (record["email"], record["role"])
+        email_owner[record["email"]] = record["id"]
+        rows.append(record)
+    if rows:
+        await db.execute(_upsert(db.bind.dialect.name, rows))
+
+
+async def sync_users(db: AsyncSession, records: list[dict]):
+    # Si un mismo id llega repetido gana el último registro
+    records = list({record["id"]: record for record in records}.values())
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    for start in range(0, len(records), SYNC_CHUNK_SIZE):
+        await _sync_chunk(db, records[start:start + SYNC_CHUNK_SIZE], counts)
+    # Todos los lotes en una sola transacción
+    await db.commit()
+    return counts